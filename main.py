@@ -4,82 +4,107 @@ Sistema de gestión de cumpleaños y mensajes automáticos
 Punto de entrada principal del proyecto
 """
 
-import argparse
 import sys
 import os
-from dotenv import load_dotenv
-
-# Cargar variables de entorno
-load_dotenv()
 
 # Agregar el directorio raíz al path para importaciones
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from utils.env import settings
 from utils.logger import logger
 
 def validate_email_config():
     """
     Valida que las variables de entorno necesarias para el proceso de email estén configuradas
     """
-    gmail_user = os.getenv('GMAIL_USER')
-    gmail_app_password = os.getenv('GMAIL_APP_PASSWORD')
-    
-    if not gmail_user or not gmail_app_password:
+    config = settings()
+
+    if not config.gmail_user or not config.gmail_app_password:
         logger.error("Variables de entorno GMAIL_USER y GMAIL_APP_PASSWORD no están configuradas")
         logger.error("Asegúrate de tener un archivo .env con estas variables")
         return False
-    
-    logger.info(f"Configuración de Gmail validada: {gmail_user}")
+
+    logger.info(f"Configuración de Gmail validada: {config.gmail_user}")
     return True
 
 def validate_whatsapp_config():
     """
     Valida que las variables de entorno necesarias para el proceso de WhatsApp estén configuradas
     """
-    whatsapp_url = os.getenv('WHATSAPP_URL')
-    whatsapp_user = os.getenv('WHATSAPP_USER')
-    whatsapp_pass = os.getenv('WHATSAPP_PASS')
-    
-    if not whatsapp_url or not whatsapp_user or not whatsapp_pass:
+    config = settings()
+
+    if not config.whatsapp_url or not config.whatsapp_user or not config.whatsapp_pass:
         logger.error("Variables de entorno WHATSAPP_URL, WHATSAPP_USER y WHATSAPP_PASS no están configuradas")
         logger.error("Asegúrate de tener un archivo .env con estas variables")
         return False
-    
-    logger.info(f"Configuración de WhatsApp validada: {whatsapp_user}")
+
+    logger.info(f"Configuración de WhatsApp validada: {config.whatsapp_user}")
     return True
 
+_VALID_PROCESSES = ('send_email', 'send_whatsapp')
+
+_HELP = """Uso: python main.py --process {send_email,send_whatsapp}
+
+Sistema de gestión de cumpleaños y mensajes automáticos
+
+Opciones:
+  --process, -p   Proceso a ejecutar: send_email o send_whatsapp
+  --help, -h      Muestra esta ayuda
+
+Ejemplos de uso:
+  python main.py --process send_email     # Ejecutar proceso de envío de emails
+  python main.py --process send_whatsapp  # Ejecutar proceso de envío de WhatsApp
+  python main.py -p send_email            # Forma abreviada
+"""
+
+def parse_process(argv):
+    """
+    Obtiene el proceso a ejecutar desde los argumentos de línea de comandos
+
+    Reemplaza a argparse para no pagar su import ni la construcción del
+    parser en cada invocación del CLI (relevante en ejecuciones por cron).
+
+    Args:
+        argv (list): Argumentos de línea de comandos (sin el nombre del script)
+
+    Returns:
+        str: Nombre del proceso solicitado, o None si no se indicó
+    """
+    if '-h' in argv or '--help' in argv:
+        print(_HELP)
+        sys.exit(0)
+
+    for flag in ('--process', '-p'):
+        if flag in argv:
+            idx = argv.index(flag)
+            if idx + 1 < len(argv):
+                return argv[idx + 1]
+
+    # Forma con '=' (--process=send_email / -p=send_email), que argparse
+    # también aceptaba
+    for arg in argv:
+        if arg.startswith('--process=') or arg.startswith('-p='):
+            return arg.split('=', 1)[1]
+
+    return None
+
 def main():
     """
     Función principal que maneja los argumentos de línea de comandos
     y ejecuta el proceso correspondiente
     """
-    parser = argparse.ArgumentParser(
-        description="Sistema de gestión de cumpleaños y mensajes automáticos",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
-Ejemplos de uso:
-  python main.py --process send_email     # Ejecutar proceso de envío de emails
-  python main.py --process send_whatsapp  # Ejecutar proceso de envío de WhatsApp
-  python main.py -p send_email            # Forma abreviada
-        """
-    )
-    
-    parser.add_argument(
-        '--process', '-p',
-        type=str,
-        required=True,
-        choices=['send_email', 'send_whatsapp'],
-        help='Proceso a ejecutar: send_email o send_whatsapp'
-    )
-    
-    args = parser.parse_args()
-    
+    proceso = parse_process(sys.argv[1:])
+
+    if proceso not in _VALID_PROCESSES:
+        print(_HELP)
+        sys.exit("Proceso inválido: usa --process send_email o --process send_whatsapp")
+
     logger.info("="*60)
     logger.info("SISTEMA DE GESTIÓN DE CUMPLEAÑOS Y MENSAJES")
     logger.info("="*60)
     
     try:
-        if args.process == 'send_email':
+        if proceso == 'send_email':
             logger.info("Ejecutando proceso: Envío de emails de cumpleaños")
             logger.info("-"*40)
             
@@ -91,7 +116,7 @@ Ejemplos de uso:
             from processes.send_email import main as send_email_main
             send_email_main()
             
-        elif args.process == 'send_whatsapp':
+        elif proceso == 'send_whatsapp':
             logger.info("Ejecutando proceso: Envío de mensajes de WhatsApp")
             logger.info("-"*40)
             
@@ -102,13 +127,9 @@ Ejemplos de uso:
             # Importar y ejecutar el proceso de envío de WhatsApp
             from processes.send_whatsapp import main as send_whatsapp_main
             send_whatsapp_main()
-            
-        else:
-            logger.error(f"Proceso '{args.process}' no reconocido")
-            sys.exit(1)
-            
+
     except ImportError as e:
-        logger.error(f"Error al importar el proceso '{args.process}': {e}")
+        logger.error(f"Error al importar el proceso '{proceso}': {e}")
         logger.error("Asegúrate de que el archivo del proceso existe y es accesible")
         sys.exit(1)
     except Exception as e:
@@ -1,23 +1,15 @@
 # Este proceso se encarga de enviar un email a los usuarios que tengan su cumpleaños en el día de hoy desde google sheets
 
-# Importaciones principales
-import pandas as pd
-from datetime import datetime
-import os
-from dotenv import load_dotenv
-
-# Cargar variables de entorno
-load_dotenv()
-
 # Importaciones de módulos locales
-from utils.sheets import GoogleSheetsManager
+# (pandas, Gmail y GoogleSheetsManager se importan dentro de las funciones
+# que los usan para no pagar su costo de import en procesos que no los necesitan)
+from utils.env import settings
 from utils.birthday import BirthdayCalculator
-from utils.gmail.main import Gmail
 from utils.logger import logger
 
-# Obtener variables de entorno
-GMAIL_USER = os.getenv('GMAIL_USER')
-GMAIL_APP_PASSWORD = os.getenv('GMAIL_APP_PASSWORD')
+# Obtener configuración centralizada (carga el .env una sola vez)
+GMAIL_USER = settings().gmail_user
+GMAIL_APP_PASSWORD = settings().gmail_app_password
 
 # Validar que las variables estén configuradas
 if not GMAIL_USER or not GMAIL_APP_PASSWORD:
@@ -27,21 +19,20 @@ if not GMAIL_USER or not GMAIL_APP_PASSWORD:
 
 # Las funciones de Google Sheets y cumpleaños ahora están en módulos separados
 
-def send_birthday_email(nombre, email):
+def send_birthday_email(gmail, nombre, email):
     """
     Envía un correo de cumpleaños usando la clase Gmail
-    
+
     Args:
+        gmail: Instancia de Gmail compartida por toda la corrida (la conexión
+            SMTP se reutiliza entre destinatarios)
         nombre (str): Nombre de la persona
         email (str): Email del destinatario
-        
+
     Returns:
         bool: True si se envió exitosamente, False en caso contrario
     """
     try:
-        # Crear instancia de Gmail
-        gmail = Gmail(GMAIL_USER, GMAIL_APP_PASSWORD)
-        
         # Datos para el template
         data = {
             "nombre": nombre
@@ -75,7 +66,12 @@ def main():
     """
     logger.info("Iniciando sistema de cumpleaños modularizado")
     logger.info("="*60)
-    
+
+    # Imports diferidos de los módulos pesados de este proceso
+    import pandas as pd
+    from utils.sheets import GoogleSheetsManager
+    from utils.gmail.main import Gmail
+
     # Inicializar managers
     sheets_manager = GoogleSheetsManager()
     
@@ -99,50 +95,61 @@ def main():
     
     correos_enviados = 0
     personas_procesadas = 0
-    
-    for index, row in df.iterrows():
-        nombre = row['nombre']
-        fecha_nacimiento = row['fecha_nacimiento']
-        correo = row['correo']
-        
-        logger.info(f"Procesando: {nombre}")
-        logger.info(f"Fecha de nacimiento: {fecha_nacimiento}")
-        logger.info(f"Correo: {correo}")
-        
-        # Obtener información completa del cumpleaños usando el módulo
-        birthday_info = BirthdayCalculator.get_birthday_info(nombre, fecha_nacimiento)
-        
-        if 'error' not in birthday_info:
-            logger.info(f"Días para cumpleaños: {birthday_info['dias_para_cumple']}")
-            logger.info(f"Edad actual: {birthday_info['edad_actual']} años")
-            logger.info(birthday_info['mensaje'])
-            
-            # Variable para tracking si se envió correo
-            correo_enviado = False
-            
-            # Enviar correo si es cumpleaños
-            if birthday_info['enviar_correo']:
-                logger.info("Enviando correo de felicitación")
-                correo_enviado = send_birthday_email(nombre, correo)
-                if correo_enviado:
-                    correos_enviados += 1
-            
-            # Escribir en bitácora usando el manager
-            logger.info("Guardando en bitácora")
-            success = sheets_manager.write_to_bitacora(
-                nombre, 
-                birthday_info['dias_para_cumple'], 
-                correo_enviado
-            )
-            
-            if success:
-                logger.success("Datos guardados exitosamente en bitácora")
+
+    # Calcular días para cumpleaños y edad de todo el conjunto de una vez (vectorizado)
+    bulk_info = BirthdayCalculator.compute_bulk(df['fecha_nacimiento'])
+
+    # Una sola instancia de Gmail para toda la corrida: la conexión SMTP se
+    # abre en el primer envío, se reutiliza para el resto y se cierra al salir
+    with Gmail(GMAIL_USER, GMAIL_APP_PASSWORD) as gmail:
+        for index, row in df.iterrows():
+            nombre = row['nombre']
+            fecha_nacimiento = row['fecha_nacimiento']
+            correo = row['correo']
+
+            logger.info(f"Procesando: {nombre}")
+            logger.info(f"Fecha de nacimiento: {fecha_nacimiento}")
+            logger.info(f"Correo: {correo}")
+
+            # Leer los valores precalculados para esta persona
+            dias_para_cumple = bulk_info['dias_para_cumple'].loc[index]
+            edad_actual = bulk_info['edad_actual'].loc[index]
+
+            if pd.notna(dias_para_cumple):
+                dias_para_cumple = int(dias_para_cumple)
+                edad_actual = int(edad_actual)
+
+                logger.info(f"Días para cumpleaños: {dias_para_cumple}")
+                logger.info(f"Edad actual: {edad_actual} años")
+                logger.info(BirthdayCalculator.get_birthday_message(nombre, dias_para_cumple))
+
+                # Variable para tracking si se envió correo
+                correo_enviado = False
+
+                # Enviar correo si es cumpleaños
+                if BirthdayCalculator.should_send_birthday_email(dias_para_cumple):
+                    logger.info("Enviando correo de felicitación")
+                    correo_enviado = send_birthday_email(gmail, nombre, correo)
+                    if correo_enviado:
+                        correos_enviados += 1
+
+                # Acumular el registro; se escribe todo junto al final
+                sheets_manager.buffer_bitacora(
+                    nombre,
+                    dias_para_cumple,
+                    correo_enviado
+                )
                 personas_procesadas += 1
             else:
-                logger.error("Error al guardar en bitácora")
-        else:
-            logger.error(f"Error: {birthday_info['error']}")
-    
+                logger.error(f"Error: no se pudo calcular el cumpleaños de {nombre} ({fecha_nacimiento})")
+
+    # Escribir todos los registros de bitácora en una sola llamada a la API
+    logger.info("Guardando en bitácora")
+    if sheets_manager.flush_bitacora():
+        logger.success("Datos guardados exitosamente en bitácora")
+    else:
+        logger.error("Error al guardar en bitácora")
+
     # Resumen final
     logger.info("RESUMEN DE PROCESAMIENTO")
     logger.info("="*60)
@@ -1,94 +1,156 @@
 # Este proceso se encargará de enviar mensajes de WhatsApp a los usuarios que tengan su cumpleaños en el día de hoy desde PostgreSQL
 
-import os
 from datetime import date
-from dotenv import load_dotenv
-
-# Cargar variables de entorno
-load_dotenv()
 
+from utils.env import settings
 from utils.logger import logger
-from utils.postgresql.main import PostgreSQLManager
 from utils.birthday import BirthdayCalculator
-from utils.whatsapp.main import send_whatsapp
-
-# Obtener variables de entorno de WhatsApp
-WHATSAPP_URL = os.getenv('WHATSAPP_URL')
-WHATSAPP_USER = os.getenv('WHATSAPP_USER')
-WHATSAPP_PASS = os.getenv('WHATSAPP_PASS')
+# (PostgreSQLManager y send_whatsapp_batch se importan dentro de las funciones
+# que los usan para que importar este módulo sea barato)
 
-def send_birthday_whatsapp(nombre, telefono):
+def send_birthday_whatsapps(pendientes, bitacora_rows):
     """
-    Envía un mensaje de WhatsApp de cumpleaños
-    
+    Envía en paralelo los mensajes de WhatsApp de cumpleaños pendientes
+
     Args:
-        nombre (str): Nombre de la persona
-        telefono (str): Número de teléfono del destinatario
-        
+        pendientes (list): Lista de tuplas (nombre, telefono, indice_bitacora)
+        bitacora_rows (list): Filas de bitácora acumuladas; se actualiza
+            notificacion_enviada en las filas cuyos mensajes se enviaron
+
     Returns:
-        bool: True si se envió exitosamente, False en caso contrario
+        int: Cantidad de mensajes enviados exitosamente
     """
-    try:
-        # Datos para el template
-        data = {
-            "nombre": nombre
-        }
-        
-        # Enviar mensaje de WhatsApp de cumpleaños
-        logger.info(f"Enviando mensaje de WhatsApp de cumpleaños a {telefono}")
-        
-        success = send_whatsapp(
-            to=telefono,
-            data=data,
-            purpose="cumple"
-        )
-        
-        if success:
+    if not pendientes:
+        return 0
+
+    # Import diferido: solo se paga cuando hay mensajes que enviar
+    from utils.whatsapp.main import send_whatsapp_batch
+
+    logger.info(f"Enviando {len(pendientes)} mensaje(s) de WhatsApp de cumpleaños en paralelo")
+
+    resultados = send_whatsapp_batch(
+        [(telefono, {"nombre": nombre}) for nombre, telefono, _ in pendientes],
+        purpose="cumple"
+    )
+
+    enviados = 0
+    for (nombre, telefono, row_idx), enviado in zip(pendientes, resultados):
+        if enviado:
             logger.success(f"Mensaje de WhatsApp de cumpleaños enviado exitosamente a {nombre}")
-            return True
+            fecha, nombre_row, dias, _ = bitacora_rows[row_idx]
+            bitacora_rows[row_idx] = (fecha, nombre_row, dias, True)
+            enviados += 1
         else:
             logger.error(f"Error al enviar mensaje de WhatsApp de cumpleaños a {nombre}")
-            return False
-            
-    except Exception as e:
-        logger.error(f"Error al enviar mensaje de WhatsApp de cumpleaños: {e}")
-        return False
+
+    return enviados
 
 def read_personas_from_db(db_manager):
     """
-    Lee todas las personas de la tabla 'persona'
-    
+    Lee todas las personas de la tabla 'persona' con su cumpleaños calculado
+
+    Los días para el cumpleaños y la edad se calculan en PostgreSQL, de
+    modo que el proceso no tiene que parsear ni recalcular fechas en Python.
+
     Args:
         db_manager: Instancia de PostgreSQLManager
-        
+
     Returns:
-        list: Lista de diccionarios con los datos de las personas
+        generator: Generador de diccionarios con los datos de las personas,
+            incluyendo 'dias_para_cumple' y 'edad_actual'; las filas se
+            traen en páginas con un cursor de servidor
+    """
+    query = """
+        SELECT
+            nombre,
+            fecha_nacimiento,
+            correo,
+            telefono,
+            EXTRACT(YEAR FROM age(current_date, fecha_nacimiento))::int AS edad_actual,
+            (
+                (fecha_nacimiento + (
+                    -- age() cuenta años cumplidos (hasta el *último* cumpleaños),
+                    -- así que hay que sumar un año salvo que hoy sea el cumpleaños
+                    (EXTRACT(YEAR FROM age(current_date, fecha_nacimiento))::int
+                     + CASE WHEN to_char(current_date, 'MMDD') <> to_char(fecha_nacimiento, 'MMDD')
+                            THEN 1 ELSE 0 END) * INTERVAL '1 year'
+                ))::date - current_date
+            ) AS dias_para_cumple
+        FROM persona;
     """
-    query = "SELECT nombre, fecha_nacimiento, correo, telefono FROM persona;"
-    return db_manager.execute_query(query)
+    return db_manager.iter_query(query, itersize=1000)
 
-def write_to_bitacora(db_manager, nombre, dias_para_cumple, notificacion_enviada):
+def write_to_bitacora(db_manager, nombre, dias_para_cumple, notificacion_enviada, today=None):
     """
     Escribe un registro en la tabla 'bitacora'
-    
+
     Args:
         db_manager: Instancia de PostgreSQLManager
         nombre (str): Nombre de la persona
         dias_para_cumple (int): Días para el cumpleaños
         notificacion_enviada (bool): Si se envió la notificación
-        
+        today (date, optional): Fecha del registro (por defecto hoy)
+
     Returns:
         bool: True si se guardó exitosamente, False en caso contrario
     """
+    if today is None:
+        today = date.today()
+
+    # Sentencia preparada: el servidor parsea y planifica el INSERT una sola vez
+    if db_manager.prepare_once(
+        'bitacora_ins',
+        "INSERT INTO bitacora (fecha, nombre, dias_para_cumple, notificacion_enviada) "
+        "VALUES ($1, $2, $3, $4)"
+    ):
+        return db_manager.execute_command(
+            "EXECUTE bitacora_ins (%s, %s, %s, %s);",
+            (today, nombre, dias_para_cumple, notificacion_enviada)
+        )
+
+    # Si no se pudo preparar, usar el INSERT directo
     query = """
         INSERT INTO bitacora (fecha, nombre, dias_para_cumple, notificacion_enviada)
         VALUES (%s, %s, %s, %s);
     """
     return db_manager.execute_command(
-        query, 
-        (date.today(), nombre, dias_para_cumple, notificacion_enviada)
+        query,
+        (today, nombre, dias_para_cumple, notificacion_enviada)
     )
 
+def write_bitacora_bulk(db_manager, rows):
+    """
+    Escribe múltiples registros en la tabla 'bitacora' en un solo INSERT
+
+    Usa execute_values de psycopg2 para insertar todas las filas en una
+    sola ida a la base de datos y un solo commit, en lugar de un INSERT
+    por persona. Si el insert masivo falla, reintenta fila por fila.
+
+    Args:
+        db_manager: Instancia de PostgreSQLManager
+        rows (list): Lista de tuplas (fecha, nombre, dias_para_cumple, notificacion_enviada)
+
+    Returns:
+        int: Cantidad de filas guardadas exitosamente
+    """
+    if not rows:
+        return 0
+
+    if db_manager.execute_values(
+        "INSERT INTO bitacora (fecha, nombre, dias_para_cumple, notificacion_enviada) VALUES %s",
+        rows,
+        page_size=1000
+    ):
+        logger.success(f"Bitácora guardada en bloque: {len(rows)} registros")
+        return len(rows)
+
+    logger.warning("Reintentando guardado de bitácora fila por fila")
+    guardadas = 0
+    for fecha, nombre, dias_para_cumple, notificacion_enviada in rows:
+        if write_to_bitacora(db_manager, nombre, dias_para_cumple, notificacion_enviada, fecha):
+            guardadas += 1
+    return guardadas
+
 def main():
     """
     Función principal que ejecuta todo el proceso de envío de WhatsApp
@@ -97,107 +159,94 @@ def main():
     logger.info("="*60)
     
     try:
+        # Import diferido del driver de base de datos
+        from utils.postgresql.main import PostgreSQLManager
+
         # Inicializar manager de PostgreSQL
         db_manager = PostgreSQLManager()
         
-        # Conectar con PostgreSQL
-        if not db_manager.connect():
+        # Conectar y verificar las tablas requeridas en una sola consulta
+        setup = db_manager.connect_and_prepare(required_tables=('persona', 'bitacora'))
+        if setup is None:
             logger.error("No se pudo establecer conexión con PostgreSQL")
             return
-        
-        # Obtener información de la base de datos
-        db_info = db_manager.get_database_info()
-        logger.info(f"Conectado a PostgreSQL: {db_info['database']} en {db_info['host']}:{db_info['port']}")
-        
-        # Verificar que existe la tabla persona
-        if not db_manager.table_exists('persona'):
-            logger.error("La tabla 'persona' no existe en la base de datos")
-            logger.error("Crea la tabla con: CREATE TABLE persona (nombre VARCHAR(255), fecha_nacimiento DATE, correo VARCHAR(255), telefono VARCHAR(20));")
-            return
-        
-        # Verificar que existe la tabla bitacora
-        if not db_manager.table_exists('bitacora'):
-            logger.error("La tabla 'bitacora' no existe en la base de datos")
-            logger.error("Crea la tabla con: CREATE TABLE bitacora (fecha DATE, nombre VARCHAR(255), dias_para_cumple INT, notificacion_enviada BOOLEAN);")
+
+        logger.info(f"Conectado a PostgreSQL: {setup.database} en {setup.host}:{setup.port}")
+
+        if setup.missing_tables:
+            for tabla in setup.missing_tables:
+                logger.error(f"La tabla '{tabla}' no existe en la base de datos")
+            logger.error("Ejecuta utils/postgresql/schema.sql para crear las tablas")
             return
         
-        # Leer datos de personas
+        # Leer datos de personas (en streaming, con cursor de servidor)
         personas = read_personas_from_db(db_manager)
-        if personas is None:
-            logger.error("No se pudieron leer los datos de la tabla 'persona'")
-            return
-        
-        logger.info(f"DATOS PRINCIPALES - {len(personas)} personas encontradas")
+
+        logger.info("DATOS PRINCIPALES - leyendo personas en streaming")
         logger.info("="*60)
         
-        # Procesar cada persona
+        # Procesar cada persona (un solo snapshot de "hoy" para toda la corrida)
+        today = date.today()
         mensajes_enviados = 0
         personas_procesadas = 0
-        
+        bitacora_rows = []
+        pendientes = []
+
         for persona in personas:
             nombre = persona['nombre']
             fecha_nacimiento = persona['fecha_nacimiento']
             telefono = persona['telefono']
-            
-            logger.info(f"Procesando: {nombre}")
-            logger.info(f"Fecha de nacimiento: {fecha_nacimiento}")
-            logger.info(f"Teléfono: {telefono}")
-            
-            # Convertir fecha de PostgreSQL a string para BirthdayCalculator
-            fecha_str = fecha_nacimiento.strftime('%d/%m/%Y')
-            
-            # Obtener información completa del cumpleaños usando el módulo
-            birthday_info = BirthdayCalculator.get_birthday_info(nombre, fecha_str)
-            
-            if 'error' not in birthday_info:
-                logger.info(f"Días para cumpleaños: {birthday_info['dias_para_cumple']}")
-                logger.info(f"Edad actual: {birthday_info['edad_actual']} años")
-                logger.info(birthday_info['mensaje'])
-                
-                # Variable para tracking si se envió mensaje
-                mensaje_enviado = False
-                
-                # Enviar mensaje si es cumpleaños
-                if birthday_info['enviar_correo'] and telefono:
-                    logger.info("Enviando mensaje de WhatsApp de felicitación")
-                    mensaje_enviado = send_birthday_whatsapp(nombre, telefono)
-                    if mensaje_enviado:
-                        mensajes_enviados += 1
-                elif not telefono:
-                    logger.warning(f"No hay número de teléfono para {nombre}")
-                
-                # Escribir en bitácora
-                logger.info("Guardando en bitácora")
-                success = write_to_bitacora(
-                    db_manager,
-                    nombre, 
-                    birthday_info['dias_para_cumple'], 
-                    mensaje_enviado
-                )
-                
-                if success:
-                    logger.success("Datos guardados exitosamente en bitácora")
-                    personas_procesadas += 1
-                else:
-                    logger.error("Error al guardar en bitácora")
-            else:
-                logger.error(f"Error: {birthday_info['error']}")
-        
+            dias_para_cumple = persona['dias_para_cumple']
+            edad_actual = persona['edad_actual']
+
+            # Una sola línea de resumen por persona; el detalle va a DEBUG
+            logger.info(
+                f"Persona: {nombre} | dias_para_cumple: {dias_para_cumple} | "
+                f"edad: {edad_actual} | telefono: {telefono or '-'}"
+            )
+            logger.debug(f"Fecha de nacimiento: {fecha_nacimiento}")
+            logger.debug(BirthdayCalculator.get_birthday_message(nombre, dias_para_cumple))
+
+            # Encolar el mensaje si es cumpleaños; se envían todos juntos al final
+            if BirthdayCalculator.should_send_birthday_email(dias_para_cumple) and telefono:
+                logger.debug("Mensaje de WhatsApp de felicitación encolado")
+                pendientes.append((nombre, telefono, len(bitacora_rows)))
+            elif not telefono:
+                logger.warning(f"No hay número de teléfono para {nombre}")
+
+            # Acumular registro para el insert masivo en bitácora
+            bitacora_rows.append((
+                today,
+                nombre,
+                dias_para_cumple,
+                False
+            ))
+            personas_procesadas += 1
+
+        # Enviar los mensajes de cumpleaños en paralelo y actualizar la bitácora
+        mensajes_enviados = send_birthday_whatsapps(pendientes, bitacora_rows)
+
+        # Guardar todos los registros de bitácora en una sola operación
+        logger.info("Guardando en bitácora")
+        guardadas = write_bitacora_bulk(db_manager, bitacora_rows)
+        if guardadas < len(bitacora_rows):
+            logger.error(f"Solo se guardaron {guardadas} de {len(bitacora_rows)} registros en bitácora")
+
         # Resumen final
         logger.info("RESUMEN DE PROCESAMIENTO")
         logger.info("="*60)
         logger.info(f"Personas procesadas: {personas_procesadas}")
         logger.info(f"Mensajes de WhatsApp enviados: {mensajes_enviados}")
-        logger.info(f"WhatsApp configurado: {WHATSAPP_USER}")
+        logger.info(f"WhatsApp configurado: {settings().whatsapp_user}")
         
-        # Mostrar información de las tablas
-        persona_count = db_manager.execute_query("SELECT COUNT(*) as total FROM persona;")
-        bitacora_count = db_manager.execute_query("SELECT COUNT(*) as total FROM bitacora;")
-        
-        if persona_count:
-            logger.info(f"Total de personas en BD: {persona_count[0]['total']}")
-        if bitacora_count:
-            logger.info(f"Total de registros en bitácora: {bitacora_count[0]['total']}")
+        # Mostrar información de las tablas (ambos conteos en una sola consulta)
+        conteos = db_manager.execute_query(
+            "SELECT (SELECT COUNT(*) FROM persona) AS personas, "
+            "(SELECT COUNT(*) FROM bitacora) AS registros_bitacora;"
+        )
+        if conteos:
+            logger.info(f"Total de personas en BD: {conteos[0]['personas']}")
+            logger.info(f"Total de registros en bitácora: {conteos[0]['registros_bitacora']}")
         
         logger.success("Proceso completado exitosamente")
         logger.info("Revisa la tabla 'bitacora' en PostgreSQL para ver los resultados")
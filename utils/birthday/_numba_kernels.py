@@ -0,0 +1,49 @@
+# Kernels opcionales compilados con Numba para cálculos masivos de cumpleaños
+#
+# Numba es una dependencia opcional: si no está instalada, HAVE_NUMBA queda en
+# False y BirthdayCalculator.compute_bulk usa la ruta vectorizada de NumPy.
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+if HAVE_NUMBA:
+
+    @njit(cache=True)
+    def _days_from_civil(y, m, d):
+        """
+        Convierte una fecha del calendario gregoriano a días desde 1970-01-01
+
+        Aritmética entera pura (algoritmo days_from_civil de Hinnant), apta
+        para compilación con Numba sin objetos date.
+        """
+        if m <= 2:
+            y -= 1
+        era = y // 400
+        yoe = y - era * 400
+        if m > 2:
+            mp = m - 3
+        else:
+            mp = m + 9
+        doy = (153 * mp + 2) // 5 + d - 1
+        doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+        return era * 146097 + doe - 719468
+
+    @njit(cache=True)
+    def days_to_birthday_bulk(months, days, today_y, today_m, today_d, out):
+        """
+        Calcula días para el próximo cumpleaños para arreglos de (mes, día)
+
+        Escribe el resultado en `out` (int64, mismo largo que months/days).
+        """
+        today_n = _days_from_civil(today_y, today_m, today_d)
+        for i in range(len(out)):
+            bday_n = _days_from_civil(today_y, months[i], days[i])
+            if bday_n < today_n:
+                bday_n = _days_from_civil(today_y + 1, months[i], days[i])
+            out[i] = bday_n - today_n
+
+else:
+    days_to_birthday_bulk = None
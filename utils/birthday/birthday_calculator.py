@@ -1,46 +1,138 @@
-from datetime import datetime, date
+from datetime import date
+from functools import lru_cache
+from operator import itemgetter
 from typing import Optional, Dict, Tuple
 from utils.logger import logger
 
+@lru_cache(maxsize=4096)
+def _parse_ddmmyyyy(fecha_nacimiento: str) -> date:
+    """
+    Parsea una fecha en formato DD/MM/YYYY a date
+
+    Para un formato fijo, el split manual evita toda la máquina de estados
+    de strptime y es varias veces más rápido. El constructor de date valida
+    rangos igual que strptime. Cacheada con lru_cache para no repetir el
+    parseo cuando la misma fecha se procesa varias veces en una corrida.
+    """
+    dia, mes, anio = fecha_nacimiento.strip().split('/')
+    return date(int(anio), int(mes), int(dia))
+
+@lru_cache(maxsize=8192)
+def _birthday_info_cached(nombre: str, fecha_nacimiento: str, today_ordinal: int,
+                          fast: bool = False) -> Dict[str, any]:
+    """
+    Versión cacheada del cálculo de información de cumpleaños
+
+    La clave incluye el ordinal del día actual, por lo que la caché se
+    invalida sola al cambiar de día.
+    """
+    try:
+        birth_date = _parse_ddmmyyyy(fecha_nacimiento)
+    except Exception as e:
+        logger.error(f"Error al calcular días para cumpleaños: {e}")
+        return {
+            "error": "No se pudo calcular información del cumpleaños",
+            "nombre": nombre,
+            "fecha_nacimiento": fecha_nacimiento
+        }
+
+    today = date.fromordinal(today_ordinal)
+    dias_para_cumple = BirthdayCalculator._days_from_date(birth_date, today)
+
+    # Camino rápido: si no es el cumpleaños, lo único que importa es cuántos
+    # días faltan y que no hay nada que enviar
+    if fast and dias_para_cumple > 0:
+        return {
+            "nombre": nombre,
+            "fecha_nacimiento": fecha_nacimiento,
+            "dias_para_cumple": dias_para_cumple,
+            "edad_actual": None,
+            "edad_siguiente": None,
+            "es_cumpleanos_hoy": False,
+            "enviar_correo": False,
+            "mensaje": ""
+        }
+
+    edad_actual = BirthdayCalculator._age_from_date(birth_date, today)
+
+    return {
+        "nombre": nombre,
+        "fecha_nacimiento": fecha_nacimiento,
+        "dias_para_cumple": dias_para_cumple,
+        "edad_actual": edad_actual,
+        "edad_siguiente": edad_actual + 1 if edad_actual else None,
+        "es_cumpleanos_hoy": dias_para_cumple == 0,
+        "enviar_correo": BirthdayCalculator.should_send_birthday_email(dias_para_cumple),
+        "mensaje": BirthdayCalculator.get_birthday_message(nombre, dias_para_cumple)
+    }
+
 class BirthdayCalculator:
     """
     Clase para manejar cálculos relacionados con cumpleaños
     """
-    
+
+    @staticmethod
+    def _days_from_date(birth_date: date, today: Optional[date] = None) -> int:
+        """
+        Calcula los días para el cumpleaños a partir de una fecha ya parseada
+
+        Args:
+            birth_date (date): Fecha de nacimiento
+            today (date, optional): Fecha de referencia (por defecto hoy)
+
+        Returns:
+            int: Días que faltan para el cumpleaños
+        """
+        if today is None:
+            today = date.today()
+
+        # Cumpleaños de este año
+        birthday_this_year = date(today.year, birth_date.month, birth_date.day)
+
+        # Si ya pasó el cumpleaños este año, calcular para el próximo año
+        if birthday_this_year < today:
+            birthday_next_year = date(today.year + 1, birth_date.month, birth_date.day)
+            return (birthday_next_year - today).days
+        return (birthday_this_year - today).days
+
+    @staticmethod
+    def _age_from_date(birth_date: date, today: Optional[date] = None) -> int:
+        """
+        Calcula la edad actual a partir de una fecha ya parseada
+
+        Args:
+            birth_date (date): Fecha de nacimiento
+            today (date, optional): Fecha de referencia (por defecto hoy)
+
+        Returns:
+            int: Edad actual
+        """
+        if today is None:
+            today = date.today()
+
+        age = today.year - birth_date.year
+
+        # Ajustar si no ha llegado el cumpleaños este año
+        if today < date(today.year, birth_date.month, birth_date.day):
+            age -= 1
+
+        return age
+
     @staticmethod
     def calculate_days_to_birthday(fecha_nacimiento: str) -> Optional[int]:
         """
         Calcula los días que faltan para el cumpleaños
-        
+
         Args:
             fecha_nacimiento (str): Fecha en formato DD/MM/YYYY
-            
+
         Returns:
             int: Días que faltan para el cumpleaños, None si hay error
         """
         try:
-            # Convertir string a datetime
-            birth_date = datetime.strptime(fecha_nacimiento, "%d/%m/%Y")
-            
-            # Obtener día y mes de nacimiento
-            birth_day = birth_date.day
-            birth_month = birth_date.month
-            
-            # Fecha actual
-            today = date.today()
-            
-            # Cumpleaños de este año
-            birthday_this_year = date(today.year, birth_month, birth_day)
-            
-            # Si ya pasó el cumpleaños este año, calcular para el próximo año
-            if birthday_this_year < today:
-                birthday_next_year = date(today.year + 1, birth_month, birth_day)
-                days_to_birthday = (birthday_next_year - today).days
-            else:
-                days_to_birthday = (birthday_this_year - today).days
-            
-            return days_to_birthday
-            
+            birth_date = _parse_ddmmyyyy(fecha_nacimiento)
+            return BirthdayCalculator._days_from_date(birth_date)
+
         except Exception as e:
             logger.error(f"Error al calcular días para cumpleaños: {e}")
             return None
@@ -93,56 +185,112 @@ class BirthdayCalculator:
             int: Edad actual, None si hay error
         """
         try:
-            birth_date = datetime.strptime(fecha_nacimiento, "%d/%m/%Y").date()
-            today = date.today()
-            
-            age = today.year - birth_date.year
-            
-            # Ajustar si no ha llegado el cumpleaños este año
-            if today < date(today.year, birth_date.month, birth_date.day):
-                age -= 1
-                
-            return age
-            
+            birth_date = _parse_ddmmyyyy(fecha_nacimiento)
+            return BirthdayCalculator._age_from_date(birth_date)
+
         except Exception as e:
             logger.error(f"Error al calcular edad: {e}")
             return None
     
     @staticmethod
-    def get_birthday_info(nombre: str, fecha_nacimiento: str) -> Dict[str, any]:
+    def get_birthday_info(nombre: str, fecha_nacimiento: str, fast: bool = False,
+                          today: Optional[date] = None) -> Dict[str, any]:
         """
         Obtiene información completa sobre el cumpleaños de una persona
-        
+
         Args:
             nombre (str): Nombre de la persona
             fecha_nacimiento (str): Fecha en formato DD/MM/YYYY
-            
+            fast (bool): Si es True y no es el cumpleaños, retorna un dict
+                mínimo sin edad ni mensaje (más barato para recorridos masivos)
+            today (date, optional): Fecha de referencia; permite a los callers
+                tomar un solo snapshot de date.today() para todo un lote
+
         Returns:
             Dict: Información completa del cumpleaños
         """
-        dias_para_cumple = BirthdayCalculator.calculate_days_to_birthday(fecha_nacimiento)
-        edad_actual = BirthdayCalculator.get_age_from_birthdate(fecha_nacimiento)
-        
-        if dias_para_cumple is None:
-            return {
-                "error": "No se pudo calcular información del cumpleaños",
-                "nombre": nombre,
-                "fecha_nacimiento": fecha_nacimiento
-            }
-        
-        info = {
-            "nombre": nombre,
-            "fecha_nacimiento": fecha_nacimiento,
-            "dias_para_cumple": dias_para_cumple,
-            "edad_actual": edad_actual,
-            "edad_siguiente": edad_actual + 1 if edad_actual else None,
-            "es_cumpleanos_hoy": dias_para_cumple == 0,
-            "enviar_correo": BirthdayCalculator.should_send_birthday_email(dias_para_cumple),
-            "mensaje": BirthdayCalculator.get_birthday_message(nombre, dias_para_cumple)
-        }
-        
-        return info
+        if today is None:
+            today = date.today()
+
+        # Delegar en la versión cacheada, con el día de referencia como parte
+        # de la clave. Se devuelve una copia para que mutar el resultado (como
+        # con el dict nuevo que se devolvía antes) no corrompa la caché
+        return dict(_birthday_info_cached(nombre, fecha_nacimiento, today.toordinal(), fast))
     
+    @staticmethod
+    def compute_bulk(fechas) -> 'pd.DataFrame':
+        """
+        Calcula días para cumpleaños y edad para un conjunto completo de fechas
+
+        Opera de forma vectorizada con pandas/NumPy en lugar de iterar
+        fila por fila, por lo que es mucho más rápido para listas grandes.
+        Las fechas que no se puedan parsear quedan con NaN en el resultado.
+
+        Args:
+            fechas: Serie o lista de fechas en formato DD/MM/YYYY
+
+        Returns:
+            pd.DataFrame: DataFrame con columnas 'dias_para_cumple' y 'edad_actual'
+        """
+        # Imports locales para no obligar a pandas en procesos que no lo usan
+        import numpy as np
+        import pandas as pd
+
+        from utils.birthday import _numba_kernels
+
+        if not isinstance(fechas, pd.Series):
+            fechas = pd.Series(fechas)
+
+        dt = pd.to_datetime(fechas, format="%d/%m/%Y", errors="coerce")
+        today = pd.Timestamp(date.today())
+
+        # Cumpleaños de este año (vectorizado); se usa para el ajuste de edad
+        this_year_bday = pd.to_datetime(
+            {'year': today.year, 'month': dt.dt.month, 'day': dt.dt.day},
+            errors='coerce'
+        )
+
+        def _numpy_days():
+            # Ruta NumPy: si el cumpleaños de este año ya pasó, usar el del
+            # próximo. Para el 29 de febrero en años no bisiestos to_datetime
+            # produce NaT, así que esas filas quedan en NaN
+            next_year_bday = pd.to_datetime(
+                {'year': today.year + 1, 'month': dt.dt.month, 'day': dt.dt.day},
+                errors='coerce'
+            )
+            next_bday = this_year_bday.where(this_year_bday >= today, next_year_bday)
+            return (next_bday - today).dt.days
+
+        if _numba_kernels.HAVE_NUMBA and len(dt):
+            # Kernel compilado: solo aritmética entera sobre (mes, día)
+            valid = dt.notna()
+            out = np.zeros(len(dt), dtype=np.int64)
+            _numba_kernels.days_to_birthday_bulk(
+                dt.dt.month.fillna(1).astype('int64').to_numpy(),
+                dt.dt.day.fillna(1).astype('int64').to_numpy(),
+                today.year, today.month, today.day,
+                out
+            )
+            dias_para_cumple = pd.Series(out, index=fechas.index).where(valid)
+
+            # El kernel normaliza silenciosamente 29/02 a 01/03 en años no
+            # bisiestos; recalcular esas filas con la ruta NumPy para que el
+            # resultado no dependa de si Numba está instalado
+            feb29 = (dt.dt.month == 2) & (dt.dt.day == 29)
+            if feb29.any():
+                dias_para_cumple = dias_para_cumple.where(~feb29, _numpy_days())
+        else:
+            dias_para_cumple = _numpy_days()
+
+        # Edad: restar 1 si todavía no llegó el cumpleaños este año
+        edad_actual = today.year - dt.dt.year - (this_year_bday > today).astype(int)
+        edad_actual = edad_actual.where(dt.notna())
+
+        return pd.DataFrame({
+            'dias_para_cumple': dias_para_cumple,
+            'edad_actual': edad_actual
+        }, index=fechas.index)
+
     @staticmethod
     def get_upcoming_birthdays(personas_data: list, days_ahead: int = 30) -> list:
         """
@@ -156,18 +304,36 @@ class BirthdayCalculator:
             list: Lista de personas con cumpleaños próximos
         """
         upcoming = []
-        
+        today = date.today()
+
         for persona in personas_data:
             nombre = persona.get('nombre', '')
             fecha_nacimiento = persona.get('fecha_nacimiento', '')
-            
-            dias_para_cumple = BirthdayCalculator.calculate_days_to_birthday(fecha_nacimiento)
-            
-            if dias_para_cumple is not None and dias_para_cumple <= days_ahead:
-                info = BirthdayCalculator.get_birthday_info(nombre, fecha_nacimiento)
-                upcoming.append(info)
-        
+
+            # Parsear una sola vez y calcular todo inline, en una sola pasada
+            try:
+                birth_date = _parse_ddmmyyyy(fecha_nacimiento)
+            except Exception as e:
+                logger.error(f"Error al calcular días para cumpleaños: {e}")
+                continue
+
+            dias_para_cumple = BirthdayCalculator._days_from_date(birth_date, today)
+            if dias_para_cumple > days_ahead:
+                continue
+
+            edad_actual = BirthdayCalculator._age_from_date(birth_date, today)
+            upcoming.append({
+                "nombre": nombre,
+                "fecha_nacimiento": fecha_nacimiento,
+                "dias_para_cumple": dias_para_cumple,
+                "edad_actual": edad_actual,
+                "edad_siguiente": edad_actual + 1 if edad_actual else None,
+                "es_cumpleanos_hoy": dias_para_cumple == 0,
+                "enviar_correo": BirthdayCalculator.should_send_birthday_email(dias_para_cumple),
+                "mensaje": BirthdayCalculator.get_birthday_message(nombre, dias_para_cumple)
+            })
+
         # Ordenar por días restantes
-        upcoming.sort(key=lambda x: x['dias_para_cumple'])
-        
+        upcoming.sort(key=itemgetter('dias_para_cumple'))
+
         return upcoming 
\ No newline at end of file
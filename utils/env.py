@@ -0,0 +1,37 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from dotenv import load_dotenv
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Configuración del proyecto leída de variables de entorno
+    """
+    gmail_user: str
+    gmail_app_password: str
+    whatsapp_url: str
+    whatsapp_user: str
+    whatsapp_pass: str
+
+@lru_cache(maxsize=1)
+def settings() -> Settings:
+    """
+    Carga el archivo .env y lee las variables de entorno una sola vez
+
+    Los módulos del proyecto llamaban cada uno a load_dotenv() y releían
+    os.getenv por su cuenta; centralizarlo aquí evita repetir la lectura y
+    el parseo del .env en cada import.
+
+    Returns:
+        Settings: Configuración congelada del proyecto
+    """
+    load_dotenv()
+
+    return Settings(
+        gmail_user=os.getenv('GMAIL_USER'),
+        gmail_app_password=os.getenv('GMAIL_APP_PASSWORD'),
+        whatsapp_url=os.getenv('WHATSAPP_URL'),
+        whatsapp_user=os.getenv('WHATSAPP_USER'),
+        whatsapp_pass=os.getenv('WHATSAPP_PASS'),
+    )
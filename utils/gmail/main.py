@@ -1,14 +1,68 @@
+import base64
+import re
 import smtplib
 import ssl
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
-from email import encoders
+from functools import lru_cache
 from typing import Dict, Optional
 import os
 from pathlib import Path
 from utils.logger import logger
 
+# Patrón {{variable}} precompilado una sola vez a nivel de módulo
+_VAR_RE = re.compile(r'\{\{(\w+)\}\}')
+
+@lru_cache(maxsize=32)
+def _load_template(path_str: str, mtime: float) -> str:
+    """
+    Lee un template de disco, cacheado por (ruta, mtime)
+
+    El mtime forma parte de la clave, así que editar el archivo invalida
+    la entrada; envíos repetidos del mismo template no vuelven a tocar disco.
+    """
+    with open(path_str, 'r', encoding='utf-8') as file:
+        return file.read()
+
+@lru_cache(maxsize=32)
+def _rewrite_template(path_str: str, mtime: float) -> str:
+    """
+    Convierte la sintaxis {{variable}} a {variable}, cacheado por (ruta, mtime)
+
+    La reescritura con regex se hace una sola vez por template; después cada
+    envío solo ejecuta str.format sobre la cadena ya reescrita.
+    """
+    return _VAR_RE.sub(r'{\1}', _load_template(path_str, mtime))
+
+class _ChunkingSMTP(smtplib.SMTP):
+    """
+    SMTP que envía el payload con BDAT (extensión CHUNKING, RFC 3030)
+
+    El comando DATA estándar obliga a smtplib a hacer dot-stuffing: un
+    escaneo Python sobre cada byte del mensaje para escapar los puntos
+    iniciales. BDAT manda el payload con longitud explícita y sin escaneo,
+    un ahorro que crece linealmente con el tamaño del cuerpo (HTML +
+    adjuntos en base64). Si el servidor no anuncia CHUNKING se usa el
+    DATA estándar.
+    """
+
+    def data(self, msg):
+        if not self.has_extn('chunking'):
+            return super().data(msg)
+
+        if isinstance(msg, str):
+            msg = smtplib._fix_eols(msg).encode('ascii')
+
+        self.send(b'BDAT %d LAST\r\n' % len(msg))
+        self.send(msg)
+        (code, reply) = self.getreply()
+        if self.debuglevel > 0:
+            self._print_debug('data:', (code, reply))
+        if code != 250:
+            raise smtplib.SMTPDataError(code, reply)
+        return (code, reply)
+
 class Gmail:
     def __init__(self, sender_email: str, sender_password: str):
         """
@@ -22,6 +76,14 @@ class Gmail:
         self.sender_password = sender_password
         self.smtp_server = "smtp.gmail.com"
         self.port = 587
+
+        # Conexión SMTP persistente (se abre en el primer envío)
+        self._server = None
+
+        # Contexto SSL construido una sola vez: create_default_context carga
+        # el almacén de CAs completo, un costo que no hay que repetir por
+        # reconexión (el contexto es seguro de reutilizar para lecturas)
+        self._ssl_context = ssl.create_default_context()
         
         # Diccionario de títulos por template
         self.template_titles = {
@@ -39,21 +101,24 @@ class Gmail:
     
     def _get_template_content(self, template_name: str) -> str:
         """
-        Obtiene el contenido del template
-        
+        Obtiene el contenido del template, ya reescrito a sintaxis {variable}
+
+        El contenido se sirve desde una caché en memoria keyed por
+        (ruta, mtime), así que solo se lee y reescribe de nuevo si el
+        archivo cambió en disco.
+
         Args:
             template_name: Nombre del template
-            
+
         Returns:
-            Contenido del template HTML
+            Contenido del template HTML listo para str.format
         """
         template_path = self.templates_dir / f"{template_name}.html"
-        
+
         if not template_path.exists():
             return self._get_default_template(template_name)
-        
-        with open(template_path, 'r', encoding='utf-8') as file:
-            return file.read()
+
+        return _rewrite_template(str(template_path), template_path.stat().st_mtime)
     
     def _get_default_template(self, template_name: str) -> str:
         """
@@ -71,27 +136,149 @@ class Gmail:
     def _format_template(self, template_content: str, data: Dict) -> str:
         """
         Formatea el template con los datos proporcionados
-        Convierte sintaxis {{variable}} a {variable} y luego formatea
-        
+
+        El contenido ya llega con sintaxis {variable} (la reescritura de
+        {{variable}} se hace una sola vez en la caché de templates), así
+        que aquí solo se aplica format_map, que usa el dict directamente
+        sin la copia a kwargs de str.format(**data).
+
         Args:
             template_content: Contenido HTML del template
             data: Diccionario con los datos para reemplazar
-            
+
         Returns:
             Template formateado
         """
         try:
-            # Convertir {{variable}} a {variable}
-            import re
-            # Reemplazar {{variable}} por {variable}
-            template_content = re.sub(r'\{\{(\w+)\}\}', r'{\1}', template_content)
-            
-            return template_content.format(**data)
+            return template_content.format_map(data)
         except KeyError as e:
             logger.warning(f"Falta la variable {e} en los datos proporcionados")
             return template_content
     
-    def send_email(self, email: str, template: str, data: Dict, 
+    def _ensure_connection(self):
+        """
+        Abre la conexión SMTP (STARTTLS + login) una sola vez y la reutiliza
+
+        El handshake TLS y la autenticación dominan el costo de cada envío,
+        así que se pagan solo en la primera llamada. Si la conexión dejó de
+        responder (NOOP distinto de 250), se reconecta automáticamente.
+
+        Returns:
+            smtplib.SMTP: Conexión SMTP autenticada y lista para enviar
+        """
+        if self._server is not None:
+            try:
+                if self._server.noop()[0] == 250:
+                    return self._server
+            except Exception:
+                pass
+            # La conexión murió: cerrarla y abrir una nueva
+            self.close()
+
+        server = _ChunkingSMTP(self.smtp_server, self.port)
+        server.starttls(context=self._ssl_context)
+        server.login(self.sender_email, self.sender_password)
+
+        self._server = server
+        return server
+
+    def close(self):
+        """Cierra la conexión SMTP persistente si está abierta"""
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+    def __enter__(self):
+        """Context manager entry: permite usar 'with Gmail(...) as gmail'"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit: cierra la conexión SMTP"""
+        self.close()
+
+    def send_bulk(self, recipients_data: list) -> int:
+        """
+        Envía varios correos reutilizando una sola conexión SMTP
+
+        Args:
+            recipients_data: Lista de tuplas (email, template, data)
+
+        Returns:
+            int: Cantidad de correos enviados exitosamente
+        """
+        enviados = 0
+        try:
+            for email, template, data in recipients_data:
+                if self.send_email(email=email, template=template, data=data):
+                    enviados += 1
+        finally:
+            self.close()
+        return enviados
+
+    def prepare_batch(self, template: str, common_data: Optional[Dict] = None,
+                      attachments: Optional[list] = None,
+                      custom_title: Optional[str] = None):
+        """
+        Precompila el envío masivo de un mismo template
+
+        El template se lee y reescribe una sola vez, el título se resuelve
+        una vez y los adjuntos se codifican en base64 una sola vez (las
+        partes MIME se comparten entre mensajes). El closure retornado
+        solo mezcla los datos del destinatario, formatea el cuerpo ya
+        cacheado y envía por la conexión SMTP persistente.
+
+        Args:
+            template: Nombre del template a usar
+            common_data: Datos comunes a todos los destinatarios
+            attachments: Lista de archivos adjuntos (opcional)
+            custom_title: Título personalizado (opcional)
+
+        Returns:
+            callable: Función (email, data) -> bool que envía un correo
+        """
+        template_content = self._get_template_content(template)
+        subject = custom_title or self.template_titles.get(template, f"Mensaje - {template}")
+        base_data = dict(common_data) if common_data else {}
+
+        # Codificar los adjuntos una sola vez; las partes resultantes se
+        # reutilizan en todos los mensajes del lote
+        attachment_parts = []
+        if attachments:
+            skeleton = MIMEMultipart("alternative")
+            for file_path in attachments:
+                self._add_attachment(skeleton, file_path)
+            attachment_parts = skeleton.get_payload()
+
+        def send_one(email: str, data: Optional[Dict] = None) -> bool:
+            try:
+                message = MIMEMultipart("alternative")
+                message["Subject"] = subject
+                message["From"] = self.sender_email
+                message["To"] = email
+
+                merged = {**base_data, **data} if data else base_data
+                html_content = self._format_template(template_content, merged)
+                message.attach(MIMEText(html_content, "html"))
+
+                for part in attachment_parts:
+                    message.attach(part)
+
+                server = self._ensure_connection()
+                server.send_message(message, from_addr=self.sender_email, to_addrs=[email])
+
+                logger.success(f"Correo enviado exitosamente a {email}")
+                return True
+
+            except Exception as e:
+                logger.error(f"Error al enviar correo a {email}: {str(e)}")
+                return False
+
+        return send_one
+
+    def send_email(self, email: str, template: str, data: Dict,
                    custom_title: Optional[str] = None, 
                    attachments: Optional[list] = None) -> bool:
         """
@@ -127,12 +314,11 @@ class Gmail:
                 for file_path in attachments:
                     self._add_attachment(message, file_path)
             
-            # Crear conexión SSL y enviar
-            context = ssl.create_default_context()
-            with smtplib.SMTP(self.smtp_server, self.port) as server:
-                server.starttls(context=context)
-                server.login(self.sender_email, self.sender_password)
-                server.sendmail(self.sender_email, email, message.as_string())
+            # Enviar reutilizando la conexión SMTP persistente; send_message
+            # serializa el MIME directo a bytes sobre el socket, sin el str
+            # intermedio de as_string() + re-encode de sendmail
+            server = self._ensure_connection()
+            server.send_message(message, from_addr=self.sender_email, to_addrs=[email])
             
             logger.success(f"Correo enviado exitosamente a {email}")
             return True
@@ -147,24 +333,35 @@ class Gmail:
     
     def _add_attachment(self, message: MIMEMultipart, file_path: str):
         """
-        Agrega un archivo adjunto al mensaje
-        
+        Agrega un archivo adjunto al mensaje codificándolo por bloques
+
+        Lee y codifica en base64 por bloques (múltiplos de 57 bytes, el
+        ancho de línea de base64) en una sola pasada. La parte MIME
+        necesita el payload codificado completo en memoria, pero así se
+        evita el doble buffer de encoders.encode_base64 (los bytes crudos
+        completos más su re-codificación).
+
         Args:
             message: Mensaje MIME
             file_path: Ruta del archivo a adjuntar
         """
         try:
-            with open(file_path, "rb") as attachment:
-                part = MIMEBase('application', 'octet-stream')
-                part.set_payload(attachment.read())
-            
-            encoders.encode_base64(part)
+            buf = bytearray()
+            with open(file_path, 'rb', buffering=1 << 16) as attachment:
+                for chunk in iter(lambda: attachment.read(57 * 1024), b''):
+                    buf += base64.encodebytes(chunk)
+
+            part = MIMEBase('application', 'octet-stream')
+            part.set_payload(buf.decode('ascii'))
+            # El payload ya está en base64: declarar el encoding a mano evita
+            # la segunda pasada de encoders.encode_base64
+            part.add_header('Content-Transfer-Encoding', 'base64')
             part.add_header(
                 'Content-Disposition',
                 f'attachment; filename= {os.path.basename(file_path)}'
             )
             message.attach(part)
-            
+
         except Exception as e:
             logger.warning(f"No se pudo adjuntar el archivo {file_path}: {str(e)}")
     
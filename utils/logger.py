@@ -1,4 +1,6 @@
+import atexit
 import logging
+import logging.handlers
 import os
 from datetime import datetime
 from pathlib import Path
@@ -28,27 +30,44 @@ class Logger:
         # Crear directorio de logs si no existe
         log_dir = Path("logs")
         log_dir.mkdir(exist_ok=True)
-        
-        # Handler para archivo
-        log_file = log_dir / f"envio_mensaje_{datetime.now().strftime('%Y%m%d')}.log"
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
-        file_handler.setLevel(logging.DEBUG)
-        
-        # Handler para consola
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        
+
         # Formato
         formatter = logging.Formatter(
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
-        
+
+        # Handler para archivo: rotativo y con apertura diferida (delay=True
+        # no toca el disco hasta el primer registro), detrás de un
+        # MemoryHandler que agrupa los writes en lotes en lugar de pagar
+        # un write a disco por cada mensaje
+        log_file = log_dir / f"envio_mensaje_{datetime.now().strftime('%Y%m%d')}.log"
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file,
+            maxBytes=10 * 1024 * 1024,
+            backupCount=5,
+            encoding='utf-8',
+            delay=True
+        )
+        file_handler.setLevel(logging.DEBUG)
         file_handler.setFormatter(formatter)
+
+        memory_handler = logging.handlers.MemoryHandler(
+            capacity=200,
+            flushLevel=logging.ERROR,
+            target=file_handler
+        )
+
+        # Handler para consola
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(logging.INFO)
         console_handler.setFormatter(formatter)
-        
-        self.logger.addHandler(file_handler)
+
+        self.logger.addHandler(memory_handler)
         self.logger.addHandler(console_handler)
+
+        # Vaciar el buffer del archivo al terminar el proceso
+        atexit.register(memory_handler.close)
     
     def info(self, message: str):
         """Log de información"""
@@ -72,11 +91,14 @@ class Logger:
     
     def success(self, message: str):
         """Log de éxito (usando INFO)"""
-        self.logger.info(f"SUCCESS: {message}")
-    
+        # Evitar armar la cadena si el nivel INFO está deshabilitado
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(f"SUCCESS: {message}")
+
     def failure(self, message: str):
         """Log de fallo (usando ERROR)"""
-        self.logger.error(f"FAILURE: {message}")
+        if self.logger.isEnabledFor(logging.ERROR):
+            self.logger.error(f"FAILURE: {message}")
 
 # Instancia global del logger
 logger = Logger() 
\ No newline at end of file
@@ -1,29 +1,56 @@
 import os
 import psycopg2
 import psycopg2.extras
+import psycopg2.pool
 import logging
 from dotenv import load_dotenv
-from typing import Optional, List, Dict, Any, Union
+from functools import cached_property
+from typing import ClassVar, Optional, List, Dict, Any, Union
+from collections import namedtuple
 from contextlib import contextmanager
+from uuid import uuid4
+
+# Resultado de connect_and_prepare: datos de conexión + tablas faltantes
+SetupInfo = namedtuple('SetupInfo', ['database', 'host', 'port', 'missing_tables'])
 
 # Cargar variables de entorno
 load_dotenv()
 
+# Variables de entorno leídas una sola vez al importar el módulo, en lugar
+# de cinco os.getenv por cada instanciación del manager
+_ENV = {
+    'host': os.getenv('POSTGRESQL_HOST', 'localhost'),
+    'database': os.getenv('POSTGRESQL_BBDD'),
+    'user': os.getenv('POSTGRESQL_USER'),
+    'password': os.getenv('POSTGRESQL_PASS'),
+    'port': os.getenv('POSTGRESQL_PORT', '5432'),
+}
+
 class PostgreSQLManager:
     """
     Clase para manejar conexiones y operaciones con PostgreSQL
     """
-    
+
+    # Pool de conexiones compartido entre instancias: el handshake TCP +
+    # autenticación se paga una vez por conexión del pool, no en cada
+    # instanciación del manager
+    _pool: ClassVar[Optional[psycopg2.pool.ThreadedConnectionPool]] = None
+
     def __init__(self):
         """
         Inicializa el manager de PostgreSQL con las variables de entorno
         """
-        self.host = os.getenv('POSTGRESQL_HOST', 'localhost')
-        self.database = os.getenv('POSTGRESQL_BBDD')
-        self.user = os.getenv('POSTGRESQL_USER')
-        self.password = os.getenv('POSTGRESQL_PASS')
-        self.port = os.getenv('POSTGRESQL_PORT', '5432')
+        self.host = _ENV['host']
+        self.database = _ENV['database']
+        self.user = _ENV['user']
+        self.password = _ENV['password']
+        self.port = _ENV['port']
         self.connection = None
+
+        # Nombres de sentencias preparadas conocidas para la conexión actual
+        # (las conexiones de psycopg2 son un tipo C sin __dict__, así que el
+        # registro vive en el manager y se limpia al cambiar de conexión)
+        self._prepared_statements = set()
         
         # Validar variables requeridas
         if not all([self.database, self.user, self.password]):
@@ -32,10 +59,14 @@ class PostgreSQLManager:
                 "POSTGRESQL_BBDD, POSTGRESQL_USER, POSTGRESQL_PASS"
             )
     
+    @cached_property
     def get_connection_string(self) -> str:
         """
-        Genera la cadena de conexión para PostgreSQL
-        
+        Cadena de conexión para PostgreSQL
+
+        Todos los componentes son inmutables después de __init__, así que
+        la cadena se construye una sola vez y queda cacheada en la instancia.
+
         Returns:
             str: Cadena de conexión formateada
         """
@@ -43,34 +74,91 @@ class PostgreSQLManager:
     
     def connect(self) -> bool:
         """
-        Establece conexión con la base de datos PostgreSQL
-        
+        Toma una conexión del pool compartido (creándolo si es la primera vez)
+
+        La conexión queda asociada a la instancia hasta disconnect(), que
+        la devuelve al pool en lugar de cerrarla, así las sentencias
+        preparadas y el socket se reutilizan entre corridas.
+
         Returns:
             bool: True si la conexión fue exitosa, False en caso contrario
         """
         try:
-            self.connection = psycopg2.connect(
-                host=self.host,
-                port=self.port,
-                database=self.database,
-                user=self.user,
-                password=self.password
-            )
+            if PostgreSQLManager._pool is None:
+                PostgreSQLManager._pool = psycopg2.pool.ThreadedConnectionPool(
+                    1, 10,
+                    host=self.host,
+                    port=self.port,
+                    database=self.database,
+                    user=self.user,
+                    password=self.password
+                )
+            self.connection = PostgreSQLManager._pool.getconn()
+            # La conexión puede ser otra: olvidar las sentencias preparadas
+            # conocidas (prepare_once las redescubre consultando el servidor)
+            self._prepared_statements.clear()
             logging.info(f"Conexión exitosa a PostgreSQL: {self.database} en {self.host}:{self.port}")
             return True
-            
+
         except psycopg2.Error as e:
             logging.error(f"Error al conectar a PostgreSQL: {e}")
             return False
     
+    def connect_and_prepare(self, required_tables: tuple = ()) -> Optional[SetupInfo]:
+        """
+        Conecta y verifica las tablas requeridas en un solo round-trip
+
+        Combina connect() con la verificación de existencia de tablas vía
+        to_regclass, de modo que el arranque de un proceso haga una sola
+        consulta en lugar de una por tabla.
+
+        Args:
+            required_tables (tuple): Nombres de tablas que deben existir
+
+        Returns:
+            SetupInfo: Información de la conexión y lista de tablas faltantes,
+                o None si no se pudo conectar o verificar
+        """
+        if not self.connect():
+            return None
+
+        # Una sola consulta: nombre de la base + un to_regclass por tabla
+        cols = ["current_database() AS database"]
+        params = []
+        for tabla in required_tables:
+            cols.append(f"to_regclass(%s) IS NOT NULL AS {tabla}")
+            params.append(tabla)
+
+        result = self.execute_query("SELECT " + ", ".join(cols) + ";", tuple(params) or None)
+        if not result:
+            return None
+
+        row = result[0]
+        missing = [tabla for tabla in required_tables if not row[tabla]]
+
+        # Asegurar índices una sola vez en el arranque (no en cada connect,
+        # que también corre en los caminos de reconexión de los cursores)
+        if 'persona' in required_tables and 'persona' not in missing:
+            self.ensure_indexes()
+
+        return SetupInfo(
+            database=row['database'],
+            host=self.host,
+            port=self.port,
+            missing_tables=missing
+        )
+
     def disconnect(self):
         """
-        Cierra la conexión con la base de datos
+        Devuelve la conexión al pool (o la cierra si quedó inutilizable)
         """
         if self.connection:
-            self.connection.close()
+            if PostgreSQLManager._pool is not None and not self.connection.closed:
+                PostgreSQLManager._pool.putconn(self.connection)
+            else:
+                self.connection.close()
             self.connection = None
-            logging.info("Conexión a PostgreSQL cerrada")
+            logging.info("Conexión a PostgreSQL devuelta al pool")
     
     def is_connected(self) -> bool:
         """
@@ -92,10 +180,12 @@ class PostgreSQLManager:
         Yields:
             psycopg2.extras.RealDictCursor: Cursor para ejecutar consultas
         """
-        if not self.is_connected():
+        # Chequeo inline (sin la llamada a is_connected): este camino se
+        # ejecuta en cada adquisición de cursor
+        if self.connection is None or self.connection.closed:
             if not self.connect():
                 raise Exception("No se pudo establecer conexión con PostgreSQL")
-        
+
         cursor = None
         try:
             cursor = self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
@@ -120,14 +210,14 @@ class PostgreSQLManager:
             params (tuple, optional): Parámetros para la consulta
             
         Returns:
-            List[Dict[str, Any]]: Lista de diccionarios con los resultados
+            List[Dict[str, Any]]: Lista de filas con acceso por nombre de
+                columna (RealDictRow ya es un dict, no hace falta convertir)
         """
         try:
             with self.get_cursor(commit=False) as cursor:
                 cursor.execute(query, params)
-                results = cursor.fetchall()
-                return [dict(row) for row in results]
-                
+                return cursor.fetchall()
+
         except Exception as e:
             logging.error(f"Error ejecutando consulta: {e}")
             logging.error(f"Query: {query}")
@@ -135,6 +225,54 @@ class PostgreSQLManager:
                 logging.error(f"Parámetros: {params}")
             return None
     
+    def iter_query(self, query: str, params: Optional[tuple] = None, itersize: int = 1000):
+        """
+        Ejecuta una consulta SELECT con un cursor de servidor y retorna un generador
+
+        A diferencia de execute_query, las filas se van trayendo del servidor
+        en páginas de `itersize`, por lo que el pico de memoria es O(itersize)
+        en lugar del tamaño completo del resultado, y el consumidor puede
+        empezar a procesar antes de que termine el fetch. El cursor con nombre
+        vive dentro de la transacción de la conexión: al agotar el generador
+        se hace commit, y ante un error se hace rollback.
+
+        Args:
+            query (str): Consulta SQL a ejecutar
+            params (tuple, optional): Parámetros para la consulta
+            itersize (int): Cantidad de filas a traer por página
+
+        Yields:
+            Dict[str, Any]: Una fila por iteración
+        """
+        if not self.is_connected():
+            if not self.connect():
+                raise Exception("No se pudo establecer conexión con PostgreSQL")
+
+        cursor = None
+        try:
+            # Cursor con nombre = cursor de servidor (streaming)
+            cursor = self.connection.cursor(
+                name=f"stream_{uuid4().hex}",
+                cursor_factory=psycopg2.extras.RealDictCursor
+            )
+            cursor.itersize = itersize
+            cursor.execute(query, params)
+
+            # RealDictRow ya se comporta como dict: se entrega tal cual
+            yield from cursor
+
+            self.connection.commit()
+
+        except Exception as e:
+            if self.connection:
+                self.connection.rollback()
+            logging.error(f"Error ejecutando consulta con cursor de servidor: {e}")
+            logging.error(f"Query: {query}")
+            raise
+        finally:
+            if cursor is not None and not cursor.closed:
+                cursor.close()
+
     def execute_command(self, command: str, params: Optional[tuple] = None) -> bool:
         """
         Ejecuta un comando INSERT, UPDATE, DELETE
@@ -159,28 +297,134 @@ class PostgreSQLManager:
                 logging.error(f"Parámetros: {params}")
             return False
     
-    def execute_many(self, command: str, params_list: List[tuple]) -> bool:
+    def prepare_once(self, name: str, sql: str) -> bool:
         """
-        Ejecuta múltiples comandos con diferentes parámetros
-        
+        Prepara una sentencia en el servidor una sola vez por conexión
+
+        Ejecutar después con EXECUTE evita repetir el parseo y la
+        planificación de la consulta en cada llamada. Si la conexión se
+        reabre, la sentencia se vuelve a preparar automáticamente.
+
         Args:
-            command (str): Comando SQL a ejecutar
+            name (str): Nombre de la sentencia preparada
+            sql (str): SQL a preparar (con placeholders $1, $2, ...)
+
+        Returns:
+            bool: True si la sentencia quedó preparada, False en caso contrario
+        """
+        if not self.is_connected():
+            if not self.connect():
+                return False
+
+        if name in self._prepared_statements:
+            return True
+
+        # Una conexión reutilizada del pool puede traer la sentencia ya
+        # preparada por una corrida anterior: consultar antes de PREPARE
+        existing = self.execute_query(
+            "SELECT 1 FROM pg_prepared_statements WHERE name = %s;", (name,)
+        )
+        if existing:
+            self._prepared_statements.add(name)
+            return True
+
+        if self.execute_command(f"PREPARE {name} AS {sql}"):
+            self._prepared_statements.add(name)
+            return True
+        return False
+
+    def execute_values(self, template: str, params_list: List[tuple], page_size: int = 1000) -> bool:
+        """
+        Ejecuta un INSERT masivo con psycopg2.extras.execute_values
+
+        Construye una sola sentencia multi-VALUES por página en lugar de un
+        round-trip por fila como executemany, lo que reduce la latencia de
+        red en un factor del tamaño de página para inserts masivos.
+
+        Args:
+            template (str): Sentencia con un único %s donde van las tuplas
+                de VALUES (p. ej. "INSERT INTO tabla (a, b) VALUES %s")
+            params_list (List[tuple]): Lista de tuplas de valores
+            page_size (int): Cantidad de filas por sentencia generada
+
+        Returns:
+            bool: True si se ejecutó exitosamente, False en caso contrario
+        """
+        try:
+            with self.get_cursor(commit=True) as cursor:
+                psycopg2.extras.execute_values(cursor, template, params_list, page_size=page_size)
+                logging.info(f"Insertadas {len(params_list)} filas exitosamente")
+                return True
+
+        except Exception as e:
+            logging.error(f"Error en insert masivo: {e}")
+            logging.error(f"Template: {template}")
+            return False
+
+    def execute_batch(self, command: str, params_list: List[tuple], page_size: int = 1000) -> bool:
+        """
+        Ejecuta un comando muchas veces agrupando las ejecuciones por página
+
+        Variante para UPDATE/DELETE masivos: psycopg2.extras.execute_batch
+        envía las ejecuciones en lotes de `page_size` en un solo round-trip,
+        en lugar de uno por fila como executemany.
+
+        Args:
+            command (str): Comando SQL con placeholders %s
             params_list (List[tuple]): Lista de parámetros para cada ejecución
-            
+            page_size (int): Cantidad de ejecuciones por round-trip
+
         Returns:
             bool: True si se ejecutaron exitosamente, False en caso contrario
         """
         try:
             with self.get_cursor(commit=True) as cursor:
-                cursor.executemany(command, params_list)
-                logging.info(f"Ejecutados {len(params_list)} comandos exitosamente")
+                psycopg2.extras.execute_batch(cursor, command, params_list, page_size=page_size)
+                logging.info(f"Ejecutados {len(params_list)} comandos en lote exitosamente")
                 return True
-                
+
         except Exception as e:
-            logging.error(f"Error ejecutando múltiples comandos: {e}")
+            logging.error(f"Error ejecutando comandos en lote: {e}")
             logging.error(f"Comando: {command}")
             return False
+
+    def execute_many(self, command: str, params_list: List[tuple]) -> bool:
+        """
+        Ejecuta múltiples comandos con diferentes parámetros
+
+        Delega en execute_batch: en lugar del round-trip por fila de
+        executemany, las ejecuciones viajan agrupadas por página. Para
+        inserts masivos es aún mejor execute_values.
+
+        Args:
+            command (str): Comando SQL a ejecutar
+            params_list (List[tuple]): Lista de parámetros para cada ejecución
+
+        Returns:
+            bool: True si se ejecutaron exitosamente, False en caso contrario
+        """
+        return self.execute_batch(command, params_list)
     
+    def ensure_indexes(self) -> bool:
+        """
+        Crea los índices de rendimiento si no existen (idempotente)
+
+        Incluye el índice funcional (mes, día) sobre fecha_nacimiento que
+        permite resolver "cumpleaños de hoy" con un Index Scan. El caller es
+        responsable de verificar que la tabla 'persona' exista (como ya hace
+        connect_and_prepare), así no se paga una consulta extra aquí.
+
+        Returns:
+            bool: True si los índices quedaron asegurados, False en caso contrario
+        """
+        command = """
+            CREATE INDEX IF NOT EXISTS idx_persona_bday_mmdd ON persona (
+                (extract(month from fecha_nacimiento)::int),
+                (extract(day from fecha_nacimiento)::int)
+            );
+        """
+        return self.execute_command(command)
+
     def table_exists(self, table_name: str) -> bool:
         """
         Verifica si una tabla existe en la base de datos
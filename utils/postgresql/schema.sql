@@ -26,6 +26,12 @@ CREATE TABLE IF NOT EXISTS bitacora (
 
 -- Índices para mejorar rendimiento
 CREATE INDEX IF NOT EXISTS idx_persona_fecha_nacimiento ON persona(fecha_nacimiento);
+-- Índice funcional (mes, día) para buscar cumpleaños de una fecha concreta
+-- con un Index Scan en lugar de recorrer toda la tabla
+CREATE INDEX IF NOT EXISTS idx_persona_bday_mmdd ON persona (
+    (extract(month from fecha_nacimiento)::int),
+    (extract(day from fecha_nacimiento)::int)
+);
 CREATE INDEX IF NOT EXISTS idx_persona_activo ON persona(activo);
 CREATE INDEX IF NOT EXISTS idx_bitacora_fecha ON bitacora(fecha);
 CREATE INDEX IF NOT EXISTS idx_bitacora_nombre ON bitacora(nombre);
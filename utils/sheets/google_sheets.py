@@ -12,6 +12,9 @@ load_dotenv()
 # Importar logger
 from utils.logger import logger
 
+# Índice branchless para la columna correo_enviado: bool -> 'NO'/'SI'
+_SI_NO = ('NO', 'SI')
+
 class GoogleSheetsManager:
     """
     Clase para manejar todas las operaciones con Google Sheets
@@ -34,7 +37,18 @@ class GoogleSheetsManager:
             raise ValueError("GOOGLE_SHEETS_ID no está configurado en las variables de entorno")
         
         self.gc = None
-        
+
+        # Handles cacheados: abrir el spreadsheet y buscar worksheets son
+        # round-trips HTTP a la API, así que se pagan una sola vez y se
+        # invalidan solo con refresh()
+        self._spreadsheet = None
+        self._worksheets = {}
+
+        # Handle de la hoja de bitácora (cacheado tras el primer acceso) y
+        # buffer de registros pendientes de escribir en un solo append_rows
+        self._bitacora_sheet = None
+        self._bitacora_buffer = []
+
         # Scopes necesarios para Google Sheets
         self.scope = [
             "https://www.googleapis.com/auth/spreadsheets",
@@ -69,33 +83,82 @@ class GoogleSheetsManager:
             logger.error(f"Error al conectar con Google Sheets: {str(e)}")
             return False
     
-    def read_main_sheet(self) -> Optional[pd.DataFrame]:
+    def _open(self) -> Optional['gspread.Spreadsheet']:
         """
-        Lee los datos de la hoja principal del Google Sheets
-        
+        Retorna el spreadsheet, abriéndolo solo la primera vez
+
         Returns:
-            pd.DataFrame: DataFrame con los datos o None si hay error
+            gspread.Spreadsheet: Handle del spreadsheet o None si hay error
         """
+        if self._spreadsheet is not None:
+            return self._spreadsheet
+
         if not self.gc:
             logger.error("No hay conexión establecida. Llama a connect() primero.")
             return None
+
+        self._spreadsheet = self.gc.open_by_key(self.spreadsheet_id)
+        return self._spreadsheet
+
+    def _get_worksheet(self, title: str) -> Optional['gspread.Worksheet']:
+        """
+        Busca una worksheet por título, cacheando el resultado
+
+        Args:
+            title (str): Título de la worksheet
+
+        Returns:
+            gspread.Worksheet: La worksheet o None si no existe
+        """
+        if title in self._worksheets:
+            return self._worksheets[title]
+
+        spreadsheet = self._open()
+        if spreadsheet is None:
+            return None
+
+        worksheet = spreadsheet.worksheet(title)
+        self._worksheets[title] = worksheet
+        return worksheet
+
+    def refresh(self) -> None:
+        """
+        Invalida los handles cacheados; el próximo acceso reabre el spreadsheet
+        """
+        self._spreadsheet = None
+        self._worksheets = {}
+        self._bitacora_sheet = None
+
+    def read_main_sheet(self) -> Optional[pd.DataFrame]:
+        """
+        Lee los datos de la hoja principal del Google Sheets
         
+        Returns:
+            pd.DataFrame: DataFrame con los datos o None si hay error
+        """
         try:
-            # Abrir el spreadsheet
+            # Abrir el spreadsheet (cacheado tras la primera apertura)
             logger.info(f"Abriendo Google Sheets: {self.spreadsheet_id}")
-            spreadsheet = self.gc.open_by_key(self.spreadsheet_id)
-            
+            spreadsheet = self._open()
+            if spreadsheet is None:
+                return None
+
             # Obtener la primera hoja (worksheet)
             worksheet = spreadsheet.sheet1
             logger.info(f"Hoja seleccionada: {worksheet.title}")
             
-            # Obtener todos los datos
+            # Obtener todos los datos como lista 2-D y construir el DataFrame
+            # directamente: get_all_records arma un dict por fila que pandas
+            # vuelve a desarmar, un costo O(filas x columnas) innecesario
             logger.info("Obteniendo datos")
-            data = worksheet.get_all_records()
-            
-            # Convertir a DataFrame
-            df = pd.DataFrame(data)
-            
+            rows = worksheet.get_all_values()
+
+            if not rows:
+                logger.warning("La hoja principal está vacía")
+                return pd.DataFrame()
+
+            df = pd.DataFrame(rows[1:], columns=rows[0])
+
             logger.success("Datos obtenidos exitosamente")
             logger.info(f"Dimensiones: {df.shape[0]} filas x {df.shape[1]} columnas")
             
@@ -112,31 +175,33 @@ class GoogleSheetsManager:
         Returns:
             gspread.Worksheet: La hoja de bitácora o None si hay error
         """
-        if not self.gc:
-            logger.error("No hay conexión establecida.")
-            return None
-        
+        if self._bitacora_sheet is not None:
+            return self._bitacora_sheet
+
         try:
-            # Abrir el spreadsheet
-            spreadsheet = self.gc.open_by_key(self.spreadsheet_id)
-            
+            # Abrir el spreadsheet (cacheado)
+            spreadsheet = self._open()
+            if spreadsheet is None:
+                return None
+
             # Intentar obtener la hoja "bitacora"
             try:
-                bitacora_sheet = spreadsheet.worksheet("bitacora")
+                bitacora_sheet = self._get_worksheet("bitacora")
                 logger.success("Hoja 'bitacora' encontrada")
-                return bitacora_sheet
             except gspread.WorksheetNotFound:
                 # Crear la hoja si no existe
                 bitacora_sheet = spreadsheet.add_worksheet(title="bitacora", rows="100", cols="20")
                 logger.success("Hoja 'bitacora' creada")
-                
+
                 # Agregar headers
                 headers = [['fecha', 'nombre', 'dias_para_cumple', 'correo_enviado']]
                 bitacora_sheet.update('A1:D1', headers)
                 logger.success("Headers agregados a la hoja 'bitacora'")
-                
-                return bitacora_sheet
-                
+
+            self._worksheets["bitacora"] = bitacora_sheet
+            self._bitacora_sheet = bitacora_sheet
+            return bitacora_sheet
+
         except Exception as e:
             logger.error(f"Error al manejar hoja bitacora: {e}")
             return None
@@ -161,25 +226,96 @@ class GoogleSheetsManager:
             
             # Obtener la fecha actual en formato YYYYMMDD
             fecha_actual = datetime.now().strftime("%Y%m%d")
-            
-            # Preparar datos a insertar
-            nueva_fila = [fecha_actual, nombre, dias_para_cumple, "SI" if correo_enviado else "NO"]
-            
+
+            # Preparar datos a insertar (el 'SI'/'NO' se resuelve una sola vez)
+            enviado = _SI_NO[correo_enviado]
+            nueva_fila = [fecha_actual, nombre, dias_para_cumple, enviado]
+
             # Agregar nueva fila
             bitacora_sheet.append_row(nueva_fila)
-            
+
             logger.success("Datos guardados en bitacora")
             logger.info(f"Fecha: {fecha_actual}")
             logger.info(f"Nombre: {nombre}")
             logger.info(f"Días para cumpleaños: {dias_para_cumple}")
-            logger.info(f"Correo enviado: {'SI' if correo_enviado else 'NO'}")
+            logger.info(f"Correo enviado: {enviado}")
             
             return True
             
         except Exception as e:
             logger.error(f"Error al escribir en bitacora: {e}")
             return False
-    
+
+    def buffer_bitacora(self, nombre: str, dias_para_cumple: int, correo_enviado: bool = False) -> None:
+        """
+        Acumula un registro de bitácora en memoria (no llama a la API)
+
+        Los registros acumulados se escriben todos juntos con
+        flush_bitacora(), en una sola llamada a la API en lugar de una
+        por persona.
+
+        Args:
+            nombre (str): Nombre de la persona
+            dias_para_cumple (int): Días que faltan para el cumpleaños
+            correo_enviado (bool): Si se envió correo de cumpleaños
+        """
+        self._bitacora_buffer.append((nombre, dias_para_cumple, correo_enviado))
+
+    def flush_bitacora(self) -> bool:
+        """
+        Escribe todos los registros acumulados con buffer_bitacora
+
+        Returns:
+            bool: True si se escribieron (o no había nada pendiente),
+                False en caso contrario
+        """
+        if not self._bitacora_buffer:
+            return True
+
+        registros, self._bitacora_buffer = self._bitacora_buffer, []
+        return self.write_bitacora_batch(registros)
+
+    def write_bitacora_batch(self, records: list) -> bool:
+        """
+        Escribe múltiples registros en la hoja "bitacora" en una sola llamada
+
+        Usa append_rows para mandar todas las filas en un solo round-trip
+        HTTP, en lugar de un append_row (y su cuota de API) por registro.
+
+        Args:
+            records (list): Lista de tuplas (nombre, dias_para_cumple, correo_enviado)
+
+        Returns:
+            bool: True si se escribió exitosamente, False en caso contrario
+        """
+        if not records:
+            return True
+
+        try:
+            bitacora_sheet = self.ensure_bitacora_sheet()
+            if not bitacora_sheet:
+                return False
+
+            # Una sola fecha y un solo lookup por fila para todo el lote
+            fecha_actual = datetime.now().strftime("%Y%m%d")
+            filas = [
+                [fecha_actual, nombre, dias_para_cumple, _SI_NO[correo_enviado]]
+                for nombre, dias_para_cumple, correo_enviado in records
+            ]
+
+            bitacora_sheet.append_rows(
+                filas,
+                value_input_option='USER_ENTERED',
+                insert_data_option='INSERT_ROWS'
+            )
+
+            logger.success(f"Guardados {len(filas)} registros en bitacora en una sola llamada")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error al escribir lote en bitacora: {e}")
+            return False
+
     def get_bitacora_data(self) -> Optional[pd.DataFrame]:
         """
         Lee los datos de la hoja "bitacora"
@@ -194,10 +330,23 @@ class GoogleSheetsManager:
             
             # Obtener todos los datos
             data = bitacora_sheet.get_all_records()
-            
-            # Convertir a DataFrame
-            df = pd.DataFrame(data)
-            
+
+            # Construir el DataFrame con las columnas conocidas y convertir
+            # cada una con una sola pasada vectorizada; to_numeric con
+            # errors='coerce' deja NaN en celdas vacías o editadas a mano
+            # en lugar de tirar abajo toda la lectura
+            df = pd.DataFrame.from_records(
+                data,
+                columns=['fecha', 'nombre', 'dias_para_cumple', 'correo_enviado']
+            )
+            if not df.empty:
+                df['dias_para_cumple'] = pd.to_numeric(df['dias_para_cumple'], errors='coerce')
+                df = df.astype({
+                    'fecha': 'string',
+                    'nombre': 'string',
+                    'correo_enviado': 'string'
+                })
+
             logger.success(f"Datos de bitácora obtenidos: {df.shape[0]} registros")
             return df
             
@@ -214,16 +363,21 @@ class GoogleSheetsManager:
         """
         if not self.gc:
             return {"error": "No hay conexión establecida"}
-        
+
         try:
-            spreadsheet = self.gc.open_by_key(self.spreadsheet_id)
-            
+            spreadsheet = self._open()
+            if spreadsheet is None:
+                return {"error": "No se pudo abrir el spreadsheet"}
+
+            # worksheets() es un round-trip a la API: pedirlo una sola vez
+            worksheets = spreadsheet.worksheets()
+
             info = {
                 "title": spreadsheet.title,
                 "id": spreadsheet.id,
                 "url": spreadsheet.url,
-                "worksheets": [ws.title for ws in spreadsheet.worksheets()],
-                "worksheet_count": len(spreadsheet.worksheets())
+                "worksheets": [ws.title for ws in worksheets],
+                "worksheet_count": len(worksheets)
             }
             
             return info
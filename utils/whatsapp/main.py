@@ -1,12 +1,100 @@
+import base64
 import os
 import logging
 import requests
 import re
+import string
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter, Retry
 from dotenv import load_dotenv
 
+# Serializador JSON: orjson (implementado en C, varias veces más rápido)
+# si está disponible, con fallback al json de la biblioteca estándar
+try:
+    from orjson import dumps as _json_dumps, loads as _json_loads
+except ImportError:
+    import json
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
+    _json_loads = json.loads
+
+# Header precalculado para mandar el cuerpo ya serializado (evita que
+# requests vuelva a serializar el payload con el json estándar)
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
 # Cargar variables de entorno
 load_dotenv()
 
+# Configuración de WhatsApp leída una sola vez al importar: los valores no
+# cambian durante la vida del proceso, así que no hay que consultar
+# os.environ (ni reconstruir la URL del endpoint) en cada envío
+_WA_URL = (os.getenv('WHATSAPP_URL') or '').rstrip('/') + '/send/message'
+_WA_AUTH = (os.getenv('WHATSAPP_USER'), os.getenv('WHATSAPP_PASS'))
+_WA_CONFIGURED = bool(os.getenv('WHATSAPP_URL') and _WA_AUTH[0] and _WA_AUTH[1])
+
+# Sufijo del JID de WhatsApp: concatenar con una constante evita el
+# BUILD_STRING del f-string en cada envío
+_JID_SUFFIX = "@s.whatsapp.net"
+
+# Patrón de caracteres no numéricos precompilado una sola vez: el método
+# ligado evita el lookup en la caché interna de re.sub en cada llamada
+_NON_DIGIT_RE = re.compile(r'[^0-9]')
+
+# Tabla de borrado para str.translate: elimina todo carácter Latin-1 que no
+# sea dígito en un solo bucle C, sin pasar por el motor de regex
+_DELETE_NON_DIGITS = str.maketrans(
+    '', '', bytes(c for c in range(256) if not 0x30 <= c <= 0x39).decode('latin-1')
+)
+
+# Sesión HTTP compartida con keep-alive: reutiliza la conexión TCP/TLS
+# hacia la API de WhatsApp en lugar de abrir una nueva por mensaje (ahorra
+# el handshake por envío y acota la cantidad de sockets abiertos al pool)
+_POOL_MAXSIZE = 100
+
+_session = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=_POOL_MAXSIZE,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+)
+_session.mount('https://', _adapter)
+_session.mount('http://', _adapter)
+
+# Sin trust_env la sesión no consulta variables de proxy ni ~/.netrc en
+# cada request: el endpoint es fijo y la autenticación va por header
+_session.trust_env = False
+
+# Header Authorization calculado una sola vez sobre la sesión: pasar
+# auth=(user, pass) haría que requests construya un HTTPBasicAuth y
+# recodifique el base64 en cada envío
+if _WA_CONFIGURED:
+    _session.headers['Authorization'] = 'Basic ' + base64.b64encode(
+        f"{_WA_AUTH[0]}:{_WA_AUTH[1]}".encode()
+    ).decode('ascii')
+
+# Template de cumpleaños precompilado: las partes fijas alrededor de {nombre}
+# se calculan una sola vez al importar, y cada envío solo concatena el nombre
+_CUMPLE_TEMPLATE = "¡Feliz cumpleaños {nombre}! 🎂🎉\n\nEsperamos que tengas un día maravilloso lleno de alegría y buenos momentos. Que todos tus deseos se cumplan en este nuevo año de vida.\n\n¡Que la pases súper! 🎈✨"
+_CUMPLE_PREFIX, _CUMPLE_SUFFIX = _CUMPLE_TEMPLATE.split("{nombre}")
+
+# Templates simples para WhatsApp, construidos una sola vez al importar en
+# lugar de un dict nuevo por cada load_template
+_TEMPLATES = {
+    "cumple": _CUMPLE_TEMPLATE,
+    "bienvenida": "¡Bienvenido {nombre}! 👋\n\nNos alegra tenerte con nosotros. Esperamos que disfrutes de todos nuestros servicios.\n\n¡Que tengas un excelente día! 😊",
+    "confirmacion": "Hola {nombre}, 👋\n\nTu solicitud ha sido confirmada exitosamente. Te mantendremos informado sobre cualquier actualización.\n\n¡Gracias por confiar en nosotros! 🙏"
+}
+
+# Templates preparseados una sola vez en listas de segmentos (literal, campo):
+# expandir se reduce a concatenar literales y buscar cada campo en el dict,
+# sin volver a correr el parser del mini-lenguaje de str.format por mensaje
+_COMPILED = {
+    purpose: [(literal, field) for literal, field, _, _ in string.Formatter().parse(tmpl)]
+    for purpose, tmpl in _TEMPLATES.items()
+}
+
 def extract_numeric_characters(text: str) -> str:
     """
     Extract only numeric characters from a string.
@@ -17,7 +105,11 @@ def extract_numeric_characters(text: str) -> str:
     Returns:
         str: String containing only numeric characters.
     """
-    return re.sub(r'[^0-9]', '', text)
+    digits = text.translate(_DELETE_NON_DIGITS)
+    if not digits.isascii():
+        # Quedaron caracteres fuera de Latin-1: limpiar con la regex de respaldo
+        digits = _NON_DIGIT_RE.sub('', digits)
+    return digits
 
 def load_template(purpose: str, data: dict, template_type: str = "whatsapp") -> str:
     """
@@ -31,31 +123,35 @@ def load_template(purpose: str, data: dict, template_type: str = "whatsapp") ->
     Returns:
         str: Formatted message or None if template not found.
     """
+    # Camino rápido para el template más usado: concatenación pura
+    if purpose == "cumple" and "nombre" in data:
+        return _CUMPLE_PREFIX + str(data["nombre"]) + _CUMPLE_SUFFIX
+
+    segments = _COMPILED.get(purpose)
+    if segments is None:
+        logging.error("Template not found for purpose: %s", purpose)
+        return None
+
+    # try estrecho: solo la sustitución puede fallar (clave faltante),
+    # sin pagar un frame de excepción alrededor de todo el cuerpo
     try:
-        # Templates simples para WhatsApp
-        templates = {
-            "cumple": "¡Feliz cumpleaños {nombre}! 🎂🎉\n\nEsperamos que tengas un día maravilloso lleno de alegría y buenos momentos. Que todos tus deseos se cumplan en este nuevo año de vida.\n\n¡Que la pases súper! 🎈✨",
-            "bienvenida": "¡Bienvenido {nombre}! 👋\n\nNos alegra tenerte con nosotros. Esperamos que disfrutes de todos nuestros servicios.\n\n¡Que tengas un excelente día! 😊",
-            "confirmacion": "Hola {nombre}, 👋\n\nTu solicitud ha sido confirmada exitosamente. Te mantendremos informado sobre cualquier actualización.\n\n¡Gracias por confiar en nosotros! 🙏"
-        }
-        
-        template = templates.get(purpose)
-        if not template:
-            logging.error(f"Template not found for purpose: {purpose}")
-            return None
-            
-        # Formatear el template con los datos
-        formatted_message = template.format(**data)
-        return formatted_message
-        
-    except Exception as e:
-        logging.error(f"Error loading template: {e}")
+        return ''.join(
+            literal + (str(data[field]) if field is not None else '')
+            for literal, field in segments
+        )
+    except KeyError as e:
+        logging.error("Missing template variable %s for purpose: %s", e, purpose)
         return None
 
 def send_whatsapp(to: str, data: dict, purpose: str = None) -> bool:
     """
     Sends a WhatsApp message using an API.
 
+    La validación del número va fusionada con la extracción de dígitos
+    (una sola pasada sobre la cadena); la validación de `data` corre solo
+    en modo debug (se elimina con `python -O`). El cuerpo del envío vive
+    en _send_whatsapp_unchecked para los llamadores internos de lotes.
+
     Args:
         to (str): Recipient's phone number.
         data (dict): Data to include in the message template.
@@ -64,60 +160,266 @@ def send_whatsapp(to: str, data: dict, purpose: str = None) -> bool:
     Returns:
         bool: True if the message was successfully sent, False otherwise.
     """
+    # Validación y extracción fusionadas en una sola pasada: translate
+    # lanza AttributeError si `to` no es str, lo que reemplaza al
+    # isinstance sin costo alguno en el camino feliz
     try:
+        digits = to.translate(_DELETE_NON_DIGITS)
+    except AttributeError:
+        logging.error("Invalid phone number.")
+        return False
+    if not digits.isascii():
+        digits = _NON_DIGIT_RE.sub('', digits)
+    if not digits:
+        logging.error("Invalid phone number.")
+        return False
+
+    if __debug__:
         # Validar parámetros
-        if not to or not isinstance(to, str):
-            logging.error("Invalid phone number.")
-            return False
         if not data or not isinstance(data, dict):
             logging.error("Invalid message data.")
             return False
-            
-        # Obtener variables de entorno
-        whatsapp_url = os.getenv('WHATSAPP_URL')
-        whatsapp_user = os.getenv('WHATSAPP_USER')
-        whatsapp_pass = os.getenv('WHATSAPP_PASS')
-        
-        if not whatsapp_url or not whatsapp_user or not whatsapp_pass:
+
+    # El número ya va limpio; la extracción en el cuerpo es idempotente
+    return _send_whatsapp_unchecked(digits, data, purpose)
+
+def _send_whatsapp_unchecked(to: str, data: dict, purpose: str = None) -> bool:
+    """
+    Cuerpo del envío sin validación de parámetros (ver send_whatsapp).
+
+    Returns:
+        bool: True if the message was successfully sent, False otherwise.
+    """
+    # Cortar de inmediato los propósitos desconocidos, antes de cualquier
+    # otro trabajo; el %r diferido evita formatear si ERROR está apagado
+    if purpose not in _TEMPLATES:
+        logging.error("Unknown purpose: %r", purpose)
+        return False
+
+    try:
+        # Verificar la configuración leída al importar el módulo
+        if not _WA_CONFIGURED:
             logging.error("WhatsApp environment variables not configured.")
             logging.error("Please set WHATSAPP_URL, WHATSAPP_USER, and WHATSAPP_PASS in your .env file.")
             return False
-        
+
         # Cargar template
         message = load_template(purpose, data, template_type="whatsapp")
         if not message:
-            logging.error(f"Failed to load template for purpose: {purpose}")
+            logging.error("Failed to load template for purpose: %s", purpose)
             return False
-            
-        # Configurar URL y credenciales
-        url = f"{whatsapp_url.rstrip('/')}/send/message"
-        credentials = (whatsapp_user, whatsapp_pass)
-        
+
         # Preparar payload
         payload = {
-            "phone": f"{extract_numeric_characters(to)}@s.whatsapp.net",
+            "phone": extract_numeric_characters(to) + _JID_SUFFIX,
             "message": message,
         }
         
-        # Enviar mensaje
-        logging.info(f"Sending WhatsApp message to {to}")
-        response = requests.post(url, json=payload, auth=credentials, timeout=10)
+        # Enviar mensaje (cuerpo serializado de antemano)
+        logging.info("Sending WhatsApp message to %s", to)
+        response = _session.post(_WA_URL, data=_json_dumps(payload),
+                                 headers=_JSON_HEADERS, timeout=10)
         response.raise_for_status()
-        
-        response_data = response.json()
+
+        # Parsear los bytes crudos con el mismo decodificador rápido del
+        # payload, sin la detección de encoding de response.json()
+        response_data = _json_loads(response.content)
         if response_data.get("code") == "SUCCESS":
-            logging.info(f"WhatsApp message sent successfully to {to}")
+            logging.info("WhatsApp message sent successfully to %s", to)
             return True
         else:
-            logging.error(f"WhatsApp API error: {response_data}")
+            logging.error("WhatsApp API error: %s", response_data)
             return False
             
-    except requests.Timeout:
-        logging.error("The request to the WhatsApp API timed out.")
-    except requests.ConnectionError:
-        logging.error("Failed to connect to the WhatsApp API.")
-    except requests.HTTPError as e:
-        logging.error(f"HTTP error while sending WhatsApp message: {e.response.status_code} - {e.response.text}")
+    except requests.RequestException as e:
+        # Un solo handler para toda la jerarquía de requests; el tipo se
+        # distingue recién acá, solo para elegir el mensaje
+        if isinstance(e, requests.Timeout):
+            logging.error("The request to the WhatsApp API timed out.")
+        elif isinstance(e, requests.ConnectionError):
+            logging.error("Failed to connect to the WhatsApp API.")
+        elif isinstance(e, requests.HTTPError):
+            logging.error("HTTP error while sending WhatsApp message: %s - %s",
+                          e.response.status_code, e.response.text)
+        else:
+            logging.error("Error while sending WhatsApp message: %s", e)
+    except Exception as e:
+        logging.error("Unexpected error while sending WhatsApp message: %s", e)
+    return False
+
+def make_sender(purpose: str, timeout: int = 10):
+    """
+    Devuelve un closure de envío especializado para un propósito fijo.
+
+    Todo lo conocido a tiempo de configuración (endpoint, sesión, headers,
+    segmentos del template) queda ligado a variables locales del closure,
+    así un bucle por destinatario solo hace lecturas de locales en lugar
+    de lookups de módulo y validaciones repetidas por envío.
+
+    Args:
+        purpose (str): Purpose of the messages (template to bind).
+        timeout (int): Per-request timeout in seconds.
+
+    Returns:
+        callable: Función (to, data) -> bool, o None si el propósito es
+            desconocido o la configuración está incompleta.
+    """
+    segments = _COMPILED.get(purpose)
+    if segments is None:
+        logging.error("Unknown purpose: %r", purpose)
+        return None
+    if not _WA_CONFIGURED:
+        logging.error("WhatsApp environment variables not configured.")
+        return None
+
+    # Ligar como locales del closure todo lo que no cambia entre envíos
+    url = _WA_URL
+    session = _session
+    headers = _JSON_HEADERS
+    suffix = _JID_SUFFIX
+    dumps = _json_dumps
+    loads = _json_loads
+    extract = extract_numeric_characters
+
+    def send(to: str, data: dict) -> bool:
+        try:
+            message = ''.join(
+                literal + (str(data[field]) if field is not None else '')
+                for literal, field in segments
+            )
+            body = dumps({"phone": extract(to) + suffix, "message": message})
+            response = session.post(url, data=body, headers=headers, timeout=timeout)
+            response.raise_for_status()
+
+            if loads(response.content).get("code") == "SUCCESS":
+                return True
+            logging.error("WhatsApp API error: %s", response.content)
+        except KeyError as e:
+            logging.error("Missing template variable %s for purpose: %s", e, purpose)
+        except requests.RequestException as e:
+            logging.error("Error while sending WhatsApp message to %s: %s", to, e)
+        return False
+
+    return send
+
+async def send_whatsapp_async(to: str, data: dict, purpose: str = None, session=None) -> bool:
+    """
+    Versión asíncrona de send_whatsapp sobre aiohttp (dependencia opcional).
+
+    Un solo hilo de event loop multiplexa todos los sockets en vuelo, por
+    lo que escala a lotes mucho más grandes que un pool de hilos sin hilos
+    extra. aiohttp se importa dentro de la función: el resto del módulo
+    funciona aunque no esté instalado.
+
+    Args:
+        to (str): Recipient's phone number.
+        data (dict): Data to include in the message template.
+        purpose (str, optional): Purpose of the message.
+        session: aiohttp.ClientSession a reutilizar; si es None se crea
+            (y cierra) una sesión propia para esta llamada.
+
+    Returns:
+        bool: True if the message was successfully sent, False otherwise.
+    """
+    import aiohttp
+
+    if purpose not in _TEMPLATES:
+        logging.error("Unknown purpose: %r", purpose)
+        return False
+
+    if not _WA_CONFIGURED:
+        logging.error("WhatsApp environment variables not configured.")
+        return False
+
+    message = load_template(purpose, data, template_type="whatsapp")
+    if not message:
+        logging.error("Failed to load template for purpose: %s", purpose)
+        return False
+
+    payload = {
+        "phone": extract_numeric_characters(to) + _JID_SUFFIX,
+        "message": message,
+    }
+
+    owned = session is None
+    if owned:
+        session = aiohttp.ClientSession()
+
+    try:
+        async with session.post(
+            _WA_URL,
+            data=_json_dumps(payload),
+            headers=_JSON_HEADERS,
+            auth=aiohttp.BasicAuth(_WA_AUTH[0], _WA_AUTH[1]),
+            timeout=aiohttp.ClientTimeout(total=10),
+        ) as response:
+            response.raise_for_status()
+            response_data = await response.json()
     except Exception as e:
-        logging.error(f"Unexpected error while sending WhatsApp message: {str(e)}")
-    return False
\ No newline at end of file
+        logging.error("Error sending WhatsApp message to %s: %s", to, e)
+        return False
+    finally:
+        if owned:
+            await session.close()
+
+    if response_data.get("code") == "SUCCESS":
+        logging.info("WhatsApp message sent successfully to %s", to)
+        return True
+    logging.error("WhatsApp API error: %s", response_data)
+    return False
+
+def send_many(items: list, purpose: str = None) -> list:
+    """
+    Envía un lote completo con asyncio reutilizando una sola sesión aiohttp.
+
+    Args:
+        items (list): List of (to, data) tuples, one per recipient.
+        purpose (str, optional): Purpose of the messages.
+
+    Returns:
+        list: List of bool results in the same order as items.
+    """
+    import asyncio
+
+    import aiohttp
+
+    if not items:
+        return []
+
+    async def _run():
+        async with aiohttp.ClientSession() as session:
+            return await asyncio.gather(*(
+                send_whatsapp_async(to, data, purpose, session)
+                for to, data in items
+            ))
+
+    return asyncio.run(_run())
+
+def send_whatsapp_batch(items: list, purpose: str = None, max_workers: int = 20) -> list:
+    """
+    Sends several WhatsApp messages concurrently.
+
+    Each send is a blocking HTTP round-trip, so dispatching them through a
+    thread pool turns N sequential round-trips into roughly
+    ceil(N / max_workers) waves of parallel requests.
+
+    La sesión compartida es segura para POSTs concurrentes (no se muta
+    después del setup del módulo) y el pool_maxsize del adapter está
+    dimensionado por encima de max_workers, así que cada hilo puede
+    mantener su propia conexión keep-alive.
+
+    Args:
+        items (list): List of (to, data) tuples, one per recipient.
+        purpose (str, optional): Purpose of the messages (template to load).
+        max_workers (int): Maximum number of concurrent sends.
+
+    Returns:
+        list: List of bool results in the same order as items.
+    """
+    if not items:
+        return []
+
+    # Nunca más hilos que conexiones disponibles en el pool del adapter
+    workers = min(max_workers, len(items), _POOL_MAXSIZE)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda item: send_whatsapp(item[0], item[1], purpose), items))
\ No newline at end of file